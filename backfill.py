@@ -0,0 +1,99 @@
+import logging
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import delivery
+import exceptions
+import homework
+import records
+import rendering
+
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 20))
+BACKFILL_RATE = float(os.getenv('BACKFILL_RATE', 10))
+
+logger = logging.getLogger(__name__)
+
+
+def summary_message(homeworks, transitions, locale=None):
+    """Возвращает одно итоговое сообщение о загруженной истории."""
+    counts = Counter(
+        records.status_value(record.status) for record in homeworks)
+    lines = [rendering.summary(len(homeworks), len(transitions), locale)]
+    for status, count in sorted(counts.items()):
+        try:
+            verdict = rendering.verdict(status, locale)
+        except ValueError:
+            verdict = status
+        lines.append(f'{verdict} - {count}')
+    return '\n'.join(lines)
+
+
+class Backfill:
+    """Загружает историю статусов для множества учётных записей.
+
+    API Практикума отдаёт всё, что изменилось после from_date, поэтому
+    на учётную запись приходится один запрос с since, а параллельность
+    идёт по учётным записям: concurrency потоков, общая частота
+    запросов ограничена rate в секунду. История сохраняется
+    в хранилище одной транзакцией, а в чат уходит одно итоговое
+    сообщение вместо сообщения на каждый переход.
+    """
+
+    def __init__(self, bot, store, session=None, breaker=None,
+                 concurrency=BACKFILL_CONCURRENCY, rate=BACKFILL_RATE):
+        """Настраивает загрузку истории в хранилище store."""
+        self.bot = bot
+        self.store = store
+        self.session = session
+        self.breaker = breaker
+        self.concurrency = concurrency
+        self.bucket = delivery.TokenBucket(rate)
+
+    def run(self, accounts, since=0):
+        """Загружает историю учётных записей начиная с since.
+
+        Возвращает словарь {ключ учётной записи: число работ или None
+        при ошибке}.
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {
+                account: executor.submit(self.fetch, account, since)
+                for account in accounts}
+            return {
+                account.key: self.complete(account, future)
+                for account, future in futures.items()}
+
+    def fetch(self, account, from_date):
+        """Запрашивает историю с учётом ограничения частоты."""
+        time.sleep(self.bucket.reserve())
+        response = homework.request_homework_statuses(
+            account.token, from_date, session=self.session,
+            breaker=self.breaker)
+        return homework.check_homeworks(response), response.get(
+            'current_date')
+
+    def complete(self, account, future):
+        """Сохраняет историю учётной записи и сообщает итог."""
+        try:
+            homeworks, current_date = future.result()
+        except Exception:
+            logger.error(f'Сбой при загрузке истории {account}',
+                         exc_info=True)
+            return None
+        account.restore(self.store)
+        transitions = account.states.diff(homeworks)
+        changes = account.states.apply(transitions)
+        account.current_timestamp = current_date or account.current_timestamp
+        self.store.save_poll(
+            account.key, account.current_timestamp, changes, transitions)
+        try:
+            homework.send_message_to_chat(
+                self.bot, account.chat_id, summary_message(
+                    homeworks, transitions, account.locale))
+        except exceptions.TelegramMessageException:
+            logger.error(f'Итог загрузки истории {account} не отправлен',
+                         exc_info=True)
+        logger.info(f'История {account} загружена: работ {len(homeworks)}')
+        return len(homeworks)
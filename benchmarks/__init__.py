@@ -0,0 +1 @@
+"""Нагрузочный стенд поллера на фейковых серверах."""
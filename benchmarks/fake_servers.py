@@ -0,0 +1,183 @@
+import json
+import random
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUS_CYCLE = ('reviewing', 'rejected', 'reviewing', 'approved')
+MESSAGE_PATTERN = re.compile(r'работы "(?P<name>[^"]+)"')
+
+
+class FakeState:
+    """Общее состояние фейковых Практикума и Telegram.
+
+    Хранит время последней смены статуса каждой работы, чтобы
+    посчитать задержку от смены статуса до уведомления.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, change_rate=0.0,
+                 telegram_latency=0.0, telegram_error_rate=0.0, seed=None):
+        """Задаёт задержки и доли ошибок; seed делает прогон повторяемым."""
+        self.latency = latency
+        self.error_rate = error_rate
+        self.change_rate = change_rate
+        self.telegram_latency = telegram_latency
+        self.telegram_error_rate = telegram_error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.homeworks = {}
+        self.changed_at = {}
+        self.latencies = []
+        self.api_requests = 0
+        self.api_errors = 0
+        self.messages = 0
+        self.telegram_errors = 0
+
+    def poll(self, token):
+        """Возвращает работу токена, иногда меняя её статус."""
+        now = time.time()
+        name = f'hw-{token}'
+        with self.lock:
+            self.api_requests += 1
+            if self.random.random() < self.error_rate:
+                self.api_errors += 1
+                return None
+            step = self.homeworks.get(name)
+            if step is None or self.random.random() < self.change_rate:
+                step = 0 if step is None else step + 1
+                self.homeworks[name] = step
+                self.changed_at[name] = now
+        return {
+            'homeworks': [{
+                'id': abs(hash(name)),
+                'homework_name': name,
+                'status': STATUS_CYCLE[step % len(STATUS_CYCLE)],
+            }],
+            'current_date': int(now),
+        }
+
+    def deliver(self, text):
+        """Учитывает сообщение; возвращает False для имитации 429."""
+        now = time.time()
+        with self.lock:
+            if self.random.random() < self.telegram_error_rate:
+                self.telegram_errors += 1
+                return False
+            self.messages += 1
+            match = MESSAGE_PATTERN.search(text or '')
+            if match:
+                changed_at = self.changed_at.pop(match.group('name'), None)
+                if changed_at is not None:
+                    self.latencies.append(now - changed_at)
+        return True
+
+    def stats(self):
+        """Возвращает накопленные счётчики."""
+        with self.lock:
+            return {
+                'api_requests': self.api_requests,
+                'api_errors': self.api_errors,
+                'messages': self.messages,
+                'telegram_errors': self.telegram_errors,
+                'latencies': list(self.latencies),
+            }
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Базовый обработчик с keep-alive и JSON-ответами."""
+
+    protocol_version = 'HTTP/1.1'
+    state = None
+
+    def send_json(self, status, data):
+        """Отправляет data как JSON-ответ с кодом status."""
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишет журнал запросов в stderr."""
+        pass
+
+
+class PracticumHandler(JSONHandler):
+    """Фейковый эндпоинт статусов домашних работ."""
+
+    def do_GET(self):
+        """Отдаёт статусы работ токена или счётчики /stats."""
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            self.send_json(HTTPStatus.OK, self.state.stats())
+            return
+        token = self.headers.get('Authorization', '').replace('OAuth ', '')
+        if not token or 'from_date' not in parse_qs(url.query):
+            self.send_json(HTTPStatus.BAD_REQUEST, {'code': 'bad_request'})
+            return
+        time.sleep(self.state.latency)
+        data = self.state.poll(token)
+        if data is None:
+            self.send_json(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {'code': 'error'})
+            return
+        self.send_json(HTTPStatus.OK, data)
+
+
+class TelegramHandler(JSONHandler):
+    """Фейковый метод sendMessage Bot API."""
+
+    def do_POST(self):
+        """Принимает sendMessage и отмечает доставку уведомления."""
+        length = int(self.headers.get('Content-Length', 0))
+        payload = self.rfile.read(length).decode('utf-8')
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = {
+                key: values[0] for key, values in parse_qs(payload).items()}
+        time.sleep(self.state.telegram_latency)
+        if not self.state.deliver(data.get('text')):
+            self.send_json(HTTPStatus.TOO_MANY_REQUESTS, {
+                'ok': False,
+                'error_code': HTTPStatus.TOO_MANY_REQUESTS,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            })
+            return
+        self.send_json(HTTPStatus.OK, {'ok': True, 'result': {
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text'),
+        }})
+
+
+class FakeServer(ThreadingHTTPServer):
+    """HTTP-сервер с длинной очередью входящих соединений."""
+
+    daemon_threads = True
+    request_queue_size = 4096
+
+
+def start_server(handler, state, host='127.0.0.1', port=0):
+    """Запускает фейковый сервер в фоновом потоке."""
+    handler_class = type(handler.__name__, (handler,), {'state': state})
+    server = FakeServer((host, port), handler_class)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def serve(practicum_port, telegram_port, ready=None, **options):
+    """Запускает оба сервера и блокируется (для отдельного процесса)."""
+    state = FakeState(**options)
+    start_server(PracticumHandler, state, port=practicum_port)
+    start_server(TelegramHandler, state, port=telegram_port)
+    if ready is not None:
+        ready.set()
+    threading.Event().wait()
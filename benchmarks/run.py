@@ -0,0 +1,208 @@
+"""Нагрузочный тест бота на фейковых Практикуме и Telegram.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.run --accounts 1 100 1000 10000 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import resource
+import socket
+import sys
+import time
+import urllib.request
+
+import telegram
+from telegram.utils.request import Request
+
+import delivery
+import homework
+import poller
+import response_cache
+import scheduler
+from benchmarks.fake_servers import serve
+
+ENDPOINT_PATH = '/api/user_api/homework_statuses/'
+BOT_TOKEN = '123456:benchmark'
+
+
+def free_port():
+    """Возвращает свободный TCP-порт."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, percent):
+    """Возвращает перцентиль списка значений."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def max_rss_mb():
+    """Возвращает пиковый RSS процесса в мегабайтах."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def start_fake_servers(options):
+    """Запускает фейковые серверы в отдельном процессе."""
+    practicum_port, telegram_port = free_port(), free_port()
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=serve, args=(practicum_port, telegram_port, ready),
+        kwargs=options, daemon=True)
+    process.start()
+    if not ready.wait(10):
+        process.terminate()
+        raise RuntimeError('Фейковые серверы не запустились')
+    return process, practicum_port, telegram_port
+
+
+def fetch_stats(practicum_port):
+    """Забирает счётчики фейковых серверов."""
+    url = f'http://127.0.0.1:{practicum_port}/stats'
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def make_accounts(count, poll_interval):
+    """Создаёт учётные записи с ускоренным расписанием опроса."""
+    accounts = []
+    for number in range(count):
+        account = poller.Account(f'token-{number}', number + 1)
+        account.schedule = scheduler.PollSchedule(
+            retry_time=poll_interval,
+            active_time=poll_interval / 2,
+            idle_time=poll_interval * 2,
+            error_time=poll_interval,
+            max_error_time=poll_interval * 4)
+        accounts.append(account)
+    return accounts
+
+
+def run_benchmark(accounts, duration=10, poll_interval=1.0,
+                  concurrency=poller.POLL_CONCURRENCY,
+                  global_rate=delivery.TELEGRAM_GLOBAL_RATE,
+                  chat_rate=delivery.TELEGRAM_CHAT_RATE, **options):
+    """Прогоняет поллер на фейковых серверах и возвращает результаты.
+
+    options передаются в FakeState: latency, error_rate, change_rate,
+    telegram_latency, telegram_error_rate, seed.
+    """
+    process, practicum_port, telegram_port = start_fake_servers(options)
+    endpoint = homework.ENDPOINT
+    homework.ENDPOINT = f'http://127.0.0.1:{practicum_port}{ENDPOINT_PATH}'
+    try:
+        bot = telegram.Bot(
+            token=BOT_TOKEN,
+            base_url=f'http://127.0.0.1:{telegram_port}/bot',
+            request=Request(con_pool_size=delivery.SEND_WORKERS))
+        outbound = delivery.OutboundQueue(
+            bot, global_rate=global_rate, chat_rate=chat_rate)
+        outbound.start()
+        cache = response_cache.ResponseCache()
+        instance = poller.Poller(
+            outbound, make_accounts(accounts, poll_interval),
+            concurrency=concurrency,
+            session=homework.create_session(pool_size=concurrency),
+            cache=cache, spread=poll_interval, tick=poll_interval / 20)
+        wall_start = time.monotonic()
+        cpu_start = time.process_time()
+        try:
+            asyncio.run(asyncio.wait_for(instance.run(), duration))
+        except asyncio.TimeoutError:
+            pass
+        wall = time.monotonic() - wall_start
+        cpu = time.process_time() - cpu_start
+        outbound.close(timeout=5, drain=False)
+        stats = fetch_stats(practicum_port)
+    finally:
+        homework.ENDPOINT = endpoint
+        process.terminate()
+        process.join()
+    latencies = stats['latencies']
+    return {
+        'accounts': accounts,
+        'duration': wall,
+        'polls': stats['api_requests'],
+        'polls_per_second': stats['api_requests'] / wall,
+        'api_errors': stats['api_errors'],
+        'messages': stats['messages'],
+        'telegram_errors': stats['telegram_errors'],
+        'p50_latency': percentile(latencies, 50),
+        'p99_latency': percentile(latencies, 99),
+        'cpu_seconds': cpu,
+        'cpu_percent': cpu / wall * 100,
+        'max_rss_mb': max_rss_mb(),
+        'cache_skip_rate': cache.skip_rate(),
+        'outbound': outbound.stats(),
+    }
+
+
+def format_result(result):
+    """Форматирует результат прогона одной строкой."""
+    return (
+        f'{result["accounts"]:>6} учётн. | '
+        f'{result["polls_per_second"]:8.1f} опросов/с | '
+        f'p50 {result["p50_latency"]:6.2f} с | '
+        f'p99 {result["p99_latency"]:6.2f} с | '
+        f'CPU {result["cpu_percent"]:5.1f}% | '
+        f'RSS {result["max_rss_mb"]:7.1f} МБ | '
+        f'без разбора {result["cache_skip_rate"]:4.0%} | '
+        f'сообщений {result["messages"]} | '
+        f'в очереди {result["outbound"]["depth"]}'
+    )
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки стенда."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--accounts', type=int, nargs='+', default=[1, 100, 1000, 10000])
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--poll-interval', type=float, default=5)
+    parser.add_argument(
+        '--concurrency', type=int, default=poller.POLL_CONCURRENCY)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--change-rate', type=float, default=0.05)
+    parser.add_argument('--telegram-latency', type=float, default=0.05)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0)
+    parser.add_argument(
+        '--global-rate', type=float, default=delivery.TELEGRAM_GLOBAL_RATE)
+    parser.add_argument(
+        '--chat-rate', type=float, default=delivery.TELEGRAM_CHAT_RATE)
+    parser.add_argument('--log-level', default='CRITICAL')
+    parser.add_argument('--json', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Прогоняет стенд для каждого числа учётных записей."""
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+    for accounts in args.accounts:
+        result = run_benchmark(
+            accounts,
+            duration=args.duration,
+            poll_interval=args.poll_interval,
+            concurrency=args.concurrency,
+            global_rate=args.global_rate,
+            chat_rate=args.chat_rate,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            change_rate=args.change_rate,
+            telegram_latency=args.telegram_latency,
+            telegram_error_rate=args.telegram_error_rate)
+        print(json.dumps(result) if args.json else format_result(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', 5))
+BREAKER_ERROR_RATIO = float(os.getenv('BREAKER_ERROR_RATIO', 0.5))
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', 50))
+BREAKER_RESET_TIME = int(os.getenv('BREAKER_RESET_TIME', 60))
+BREAKER_PROBES = int(os.getenv('BREAKER_PROBES', 1))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+BREAKER_TRANSITIONS = metrics.Counter(
+    'homework_bot_circuit_transitions_total',
+    'Переходы предохранителя API между состояниями',
+    labels=['state'])
+BREAKER_SHED = metrics.Counter(
+    'homework_bot_circuit_shed_total',
+    'Опросы, пропущенные при разомкнутом предохранителе')
+
+
+class CircuitBreaker:
+    """Предохранитель, общий для всех учётных записей одного API.
+
+    Размыкается после failures сбоев подряд или когда доля сбоев
+    среди последних window запросов достигает error_ratio. Пока он
+    разомкнут, запросы не отправляются. Через reset_time секунд
+    пропускается не больше probes пробных запросов: успех замыкает
+    предохранитель, сбой снова размыкает его. Повторное размыкание
+    после пробы не считается новым сбоем сервиса (outages).
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES,
+                 error_ratio=BREAKER_ERROR_RATIO, window=BREAKER_WINDOW,
+                 reset_time=BREAKER_RESET_TIME, probes=BREAKER_PROBES,
+                 clock=time.monotonic):
+        """Создаёт замкнутый предохранитель."""
+        self.failures = failures
+        self.error_ratio = error_ratio
+        self.reset_time = reset_time
+        self.probes = probes
+        self.clock = clock
+        self.outages = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._in_flight = 0
+        self._consecutive = 0
+        self._window = deque(maxlen=window)
+        self._window_failures = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Текущее состояние: closed, open или half_open."""
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def allow(self):
+        """Разрешает запрос или возвращает False, если его нужно пропустить.
+
+        Каждый разрешённый запрос должен закончиться вызовом success
+        или failure.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._in_flight < self.probes:
+                self._in_flight += 1
+                return True
+        BREAKER_SHED.inc()
+        return False
+
+    def retry_after(self):
+        """Возвращает, через сколько секунд повторить пропущенный опрос."""
+        with self._lock:
+            if self._state == OPEN:
+                return max(
+                    0.0, self._opened_at + self.reset_time - self.clock())
+            return self.reset_time
+
+    def success(self):
+        """Учитывает успешный ответ API."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._in_flight = max(0, self._in_flight - 1)
+                self._transition(CLOSED)
+            elif self._state == CLOSED:
+                self._consecutive = 0
+                self._record(False)
+
+    def failure(self):
+        """Учитывает сбой API.
+
+        Возвращает True, если этот сбой разомкнул предохранитель
+        и начался новый сбой сервиса.
+        """
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._in_flight = max(0, self._in_flight - 1)
+                self._transition(OPEN)
+                return False
+            if self._state == OPEN:
+                return False
+            self._consecutive += 1
+            self._record(True)
+            if not self._tripped():
+                return False
+            self.outages += 1
+            self._transition(OPEN)
+            return True
+
+    def _record(self, failed):
+        if len(self._window) == self._window.maxlen:
+            self._window_failures -= self._window[0]
+        self._window.append(failed)
+        self._window_failures += failed
+
+    def _tripped(self):
+        if self._consecutive >= self.failures:
+            return True
+        return (len(self._window) == self._window.maxlen
+                and self._window_failures >= self.error_ratio * len(
+                    self._window))
+
+    def _refresh(self):
+        if (self._state == OPEN
+                and self.clock() >= self._opened_at + self.reset_time):
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state):
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self.clock()
+        elif state == CLOSED:
+            self._consecutive = 0
+            self._window.clear()
+            self._window_failures = 0
+        BREAKER_TRANSITIONS.inc(state)
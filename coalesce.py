@@ -0,0 +1,25 @@
+import metrics
+
+COALESCED_REQUESTS = metrics.Counter(
+    'homework_bot_coalesced_requests_total',
+    'Опросы общих токенов: с запросом к API (leader) и без (shared)',
+    labels=['role'])
+
+
+def group_by_token(accounts):
+    """Группирует подписки по токену в порядке их первого появления.
+
+    Группа опрашивается одним запросом к API по расписанию первой
+    подписки, а ответ раздаётся всем подпискам группы.
+    """
+    groups = {}
+    for account in accounts:
+        groups.setdefault(account.token, []).append(account)
+    return list(groups.values())
+
+
+def count_shared(accounts):
+    """Учитывает один общий опрос для подписок accounts."""
+    if len(accounts) > 1:
+        COALESCED_REQUESTS.inc('leader')
+        COALESCED_REQUESTS.inc('shared', amount=len(accounts) - 1)
@@ -0,0 +1,123 @@
+import logging
+import os
+import time
+
+from telegram.ext import CommandHandler, Updater
+
+import rendering
+
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '1') == '1'
+COMMAND_WORKERS = int(os.getenv('COMMAND_WORKERS', 2))
+HISTORY_LIMIT = int(os.getenv('HISTORY_LIMIT', 10))
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+HISTORY_TIME_FORMAT = '%d.%m.%Y %H:%M'
+
+logger = logging.getLogger(__name__)
+
+
+class ChatAccount:
+    """Учётная запись, доступная из чата: ключ в хранилище и язык."""
+
+    __slots__ = ('key', 'locale')
+
+    def __init__(self, key, locale=None):
+        """Создаёт запись с ключом StateStore key и языком locale."""
+        self.key = key
+        self.locale = locale
+
+
+class StatusCommands:
+    """Ответы на /status и /history из локального хранилища.
+
+    Команды не обращаются к API Практикума: статусы и история берутся
+    из StateStore, который обновляет поллер. Отвечают только чаты
+    известных учётных записей; ответ уходит через bot, так что при
+    передаче delivery.OutboundQueue соблюдаются лимиты Telegram.
+    """
+
+    def __init__(self, bot, store, chats, history_limit=HISTORY_LIMIT):
+        """Принимает словарь chats {чат: [ChatAccount, ...]}."""
+        self.bot = bot
+        self.store = store
+        self.chats = {
+            str(chat_id): accounts for chat_id, accounts in chats.items()}
+        self.history_limit = history_limit
+
+    def status_text(self, chat_id):
+        """Возвращает текущие статусы работ чата или None."""
+        accounts = self.chats.get(str(chat_id))
+        if accounts is None:
+            return None
+        lines = []
+        for account in accounts:
+            for name, status in self.store.load_homeworks(account.key):
+                lines.append(
+                    f'{name}: {self._verdict(status, account.locale)}')
+        return '\n'.join(lines) or 'Статусов работ пока нет.'
+
+    def history_text(self, chat_id):
+        """Возвращает последние переходы статусов чата или None."""
+        accounts = self.chats.get(str(chat_id))
+        if accounts is None:
+            return None
+        rows = []
+        for account in accounts:
+            rows.extend(
+                (changed_at, name, self._verdict(status, account.locale))
+                for name, _, status, changed_at in self.store.load_history(
+                    account.key, self.history_limit))
+        rows.sort(key=lambda row: row[0], reverse=True)
+        lines = [
+            f'{time.strftime(HISTORY_TIME_FORMAT, time.localtime(at))} '
+            f'{name}: {verdict}'
+            for at, name, verdict in rows[:self.history_limit]]
+        return '\n'.join(lines) or 'История пока пуста.'
+
+    def status(self, update, context):
+        """Обработчик /status для telegram.ext."""
+        self._reply(update, self.status_text)
+
+    def history(self, update, context):
+        """Обработчик /history для telegram.ext."""
+        self._reply(update, self.history_text)
+
+    def _reply(self, update, build_text):
+        chat_id = update.effective_chat.id
+        text = build_text(chat_id)
+        if text is None:
+            logger.warning(f'Команда из неизвестного чата {chat_id}')
+            return
+        self.bot.send_message(chat_id=chat_id, text=text)
+
+    @staticmethod
+    def _verdict(status, locale):
+        try:
+            return rendering.verdict(status, locale)
+        except ValueError:
+            return status
+
+
+def start_updater(token, commands, webhook_url=WEBHOOK_URL):
+    """Запускает приём команд и возвращает Updater.
+
+    По умолчанию используется long polling; если задан webhook_url,
+    Telegram присылает обновления на встроенный веб-сервер. При
+    BOT_COMMANDS=0 команды не принимаются и возвращается None.
+    """
+    if not BOT_COMMANDS:
+        return None
+    updater = Updater(token=token, workers=COMMAND_WORKERS)
+    updater.dispatcher.add_handler(CommandHandler('status', commands.status))
+    updater.dispatcher.add_handler(
+        CommandHandler('history', commands.history))
+    if webhook_url:
+        updater.start_webhook(
+            listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT, url_path=WEBHOOK_PATH,
+            webhook_url=f'{webhook_url.rstrip("/")}/{WEBHOOK_PATH}')
+    else:
+        updater.start_polling(drop_pending_updates=True)
+    logger.info('Бот принимает команды /status и /history')
+    return updater
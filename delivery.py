@@ -0,0 +1,411 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import telegram
+
+import exceptions
+import metrics
+
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+SEND_MAX_ATTEMPTS = int(os.getenv('SEND_MAX_ATTEMPTS', 5))
+SEND_WORKERS = int(os.getenv('SEND_WORKERS', 4))
+OUTBOUND_QUEUE_SIZE = int(os.getenv('OUTBOUND_QUEUE_SIZE', 10000))
+OUTBOUND_PUT_TIMEOUT = float(os.getenv('OUTBOUND_PUT_TIMEOUT', 5))
+DIGEST_WINDOW = float(os.getenv('DIGEST_WINDOW', 0))
+DIGEST_MAX_LENGTH = int(os.getenv('DIGEST_MAX_LENGTH', 4096))
+DIGEST_SEPARATOR = '\n\n'
+SEND_RETRY_TIME = 1
+COOLDOWN_PRUNE_SIZE = 10000
+
+SENT = 'sent'
+FAILED = 'failed'
+REJECTED = 'rejected'
+
+PERMANENT_ERRORS = (
+    telegram.error.BadRequest,
+    telegram.error.Unauthorized,
+    telegram.error.ChatMigrated,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ограничивает частоту событий: rate в секунду, запас capacity."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """Создаёт полный запас токенов; capacity по умолчанию равен rate."""
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Забирает токен и возвращает, сколько секунд нужно подождать."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+
+class OutboundMessage:
+    """Сообщение, ожидающее отправки в Telegram.
+
+    callback, если задан, вызывается с итогом отправки: SENT,
+    FAILED (попытки исчерпаны) или REJECTED (Telegram отказал).
+    Срочное (urgent) сообщение не ждёт окна дайджеста.
+    """
+
+    __slots__ = ('chat_id', 'text', 'created', 'attempts', 'callback',
+                 'urgent')
+
+    def __init__(self, chat_id, text, created, callback=None, urgent=False):
+        """Создаёт сообщение, поставленное в очередь в момент created."""
+        self.chat_id = chat_id
+        self.text = text
+        self.created = created
+        self.attempts = 0
+        self.callback = callback
+        self.urgent = urgent
+
+
+class OutboundQueue:
+    """Очередь исходящих сообщений с учётом лимитов Telegram.
+
+    Сообщения одного чата уходят по порядку и не чаще chat_rate
+    в секунду, все чаты вместе - не чаще global_rate. Ответ RetryAfter
+    откладывает только свой чат, сообщение при этом остаётся в очереди.
+    Отправкой занимается пул из workers потоков, поэтому опрос API
+    не ждёт Telegram. Очередь ограничена maxsize сообщениями: при
+    переполнении put ждёт до put_timeout секунд.
+
+    С digest_window > 0 сообщения чата копятся до digest_window секунд
+    после первого из них и уходят одним сообщением-дайджестом длиной
+    не больше digest_max_length символов; срочное сообщение отправляет
+    накопленное сразу. Итог отправки дайджеста получает callback
+    каждого вошедшего в него сообщения.
+    Интерфейс send_message совместим с telegram.Bot.
+    """
+
+    def __init__(self, bot, global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE,
+                 max_attempts=SEND_MAX_ATTEMPTS, workers=SEND_WORKERS,
+                 maxsize=OUTBOUND_QUEUE_SIZE,
+                 put_timeout=OUTBOUND_PUT_TIMEOUT,
+                 digest_window=DIGEST_WINDOW,
+                 digest_max_length=DIGEST_MAX_LENGTH, clock=time.monotonic):
+        """Создаёт очередь; потоки отправки запускает start."""
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate, clock=clock)
+        self.chat_interval = 1 / chat_rate
+        self.max_attempts = max_attempts
+        self.workers = workers
+        self.maxsize = maxsize
+        self.put_timeout = put_timeout
+        self.digest_window = digest_window
+        self.digest_max_length = digest_max_length
+        self.clock = clock
+        self.depth = 0
+        self.in_flight = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.last_lag = 0.0
+        self.total_lag = 0.0
+        self.digests = 0
+        self._chats = {}
+        self._cooldown = {}
+        self._scheduled = {}
+        self._sending = {}
+        self._ready = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._threads = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Ставит сообщение в очередь на отправку."""
+        self.put(chat_id, text)
+
+    def put(self, chat_id, text, timeout=None, callback=None,
+            urgent=False):
+        """Ставит сообщение в очередь на отправку.
+
+        Если очередь заполнена дольше timeout секунд (по умолчанию
+        put_timeout), выбрасывает TelegramMessageException. callback
+        получает итог отправки, см. OutboundMessage.
+        """
+        if timeout is None:
+            timeout = self.put_timeout
+        with self._condition:
+            has_room = self._condition.wait_for(
+                lambda: self.depth < self.maxsize, timeout)
+            if not has_room:
+                raise exceptions.TelegramMessageException(
+                    'Очередь отправки сообщений переполнена')
+            now = self.clock()
+            pending = self._chats.get(chat_id)
+            message = OutboundMessage(chat_id, text, now, callback, urgent)
+            if pending is None:
+                pending = self._chats[chat_id] = deque([message])
+                self._push(chat_id, max(now, self._cooldown.pop(chat_id, now)))
+            else:
+                pending.append(message)
+                scheduled = self._scheduled.get(chat_id)
+                if scheduled is not None:
+                    ready_at, not_before = scheduled
+                    if self._ready_time(pending, not_before) < ready_at:
+                        self._push(chat_id, not_before)
+            self.depth += 1
+            self._condition.notify_all()
+
+    def stats(self):
+        """Возвращает глубину очереди и задержку доставки."""
+        with self._condition:
+            delivered = self.delivered
+            return {
+                'depth': self.depth,
+                'in_flight': self.in_flight,
+                'delivered': delivered,
+                'dropped': self.dropped,
+                'digests': self.digests,
+                'last_lag': self.last_lag,
+                'average_lag': self.total_lag / delivered if delivered else 0,
+            }
+
+    def register_metrics(self, registry=metrics.REGISTRY):
+        """Публикует глубину очереди и задержку доставки в /metrics."""
+        metrics.Gauge(
+            'homework_bot_outbound_depth',
+            'Сообщения в очереди отправки',
+            lambda: self.depth, registry=registry)
+        metrics.Gauge(
+            'homework_bot_outbound_in_flight',
+            'Сообщения, отправляемые в данный момент',
+            lambda: self.in_flight, registry=registry)
+        metrics.Gauge(
+            'homework_bot_outbound_lag_seconds',
+            'Задержка доставки последнего сообщения',
+            lambda: self.last_lag, registry=registry)
+
+    def start(self):
+        """Запускает пул потоков отправки сообщений."""
+        for number in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f'outbound-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self, timeout=None, drain=True):
+        """Останавливает пул.
+
+        При drain=True оставшиеся сообщения сначала отправляются,
+        не дожидаясь окна дайджеста, иначе отбрасываются все, кроме
+        уже отправляемых.
+        """
+        with self._condition:
+            self._closed = True
+            if not drain:
+                self._discard_pending()
+            for chat_id, (_, not_before) in list(self._scheduled.items()):
+                self._push(chat_id, not_before)
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _discard_pending(self):
+        for chat_id, pending in list(self._chats.items()):
+            keep = self._sending.get(chat_id, 0)
+            while len(pending) > keep:
+                pending.pop()
+                self.depth -= 1
+                self.dropped += 1
+            if not pending:
+                del self._chats[chat_id]
+        self._scheduled = {}
+        self._ready = []
+
+    def _ready_time(self, pending, not_before):
+        """Возвращает время отправки чата с учётом окна дайджеста.
+
+        not_before - время, раньше которого отправку запрещают лимиты.
+        Окно не ждут, если среди сообщений есть срочное или их текст
+        уже не помещается в один дайджест.
+        """
+        if self.digest_window <= 0 or self._closed or any(
+                message.urgent for message in pending):
+            return not_before
+        length = sum(len(message.text) for message in pending) + len(
+            DIGEST_SEPARATOR) * (len(pending) - 1)
+        if length >= self.digest_max_length:
+            return not_before
+        return max(not_before, pending[0].created + self.digest_window)
+
+    def _push(self, chat_id, not_before):
+        """Ставит чат в очередь готовности.
+
+        Прежняя запись чата в куче становится устаревшей
+        и пропускается в _take.
+        """
+        ready_at = self._ready_time(self._chats[chat_id], not_before)
+        self._scheduled[chat_id] = (ready_at, not_before)
+        heapq.heappush(self._ready, (ready_at, next(self._order), chat_id))
+
+    def _batch(self, pending):
+        """Возвращает сообщения чата для одной отправки."""
+        batch = [pending[0]]
+        if self.digest_window <= 0:
+            return batch
+        length = len(pending[0].text)
+        for message in itertools.islice(pending, 1, None):
+            length += len(DIGEST_SEPARATOR) + len(message.text)
+            if length > self.digest_max_length:
+                break
+            batch.append(message)
+        return batch
+
+    def _take(self):
+        """Ждёт чат, которому разрешена отправка, и возвращает сообщения.
+
+        Пока сообщения отправляются, чат не возвращается в очередь
+        готовности, поэтому порядок сообщений в чате сохраняется.
+        """
+        with self._condition:
+            while True:
+                if self._ready:
+                    ready_at, _, chat_id = self._ready[0]
+                    if self._scheduled.get(chat_id, (None,))[0] != ready_at:
+                        heapq.heappop(self._ready)
+                        continue
+                    delay = ready_at - self.clock()
+                    if delay <= 0:
+                        heapq.heappop(self._ready)
+                        del self._scheduled[chat_id]
+                        batch = self._batch(self._chats[chat_id])
+                        self._sending[chat_id] = len(batch)
+                        self.in_flight += len(batch)
+                        return batch
+                    self._condition.wait(delay)
+                elif self._closed and not self._chats:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _finish(self, batch, retry_after=None, result=FAILED):
+        """Снимает отправленные сообщения или откладывает их чат."""
+        with self._condition:
+            chat_id = batch[0].chat_id
+            pending = self._chats[chat_id]
+            now = self.clock()
+            self.in_flight -= len(batch)
+            del self._sending[chat_id]
+            if retry_after is None:
+                for message in batch:
+                    pending.popleft()
+                self.depth -= len(batch)
+                if result == SENT:
+                    metrics.NOTIFICATIONS_SENT.inc()
+                    self.delivered += len(batch)
+                    self.last_lag = now - batch[0].created
+                    self.total_lag += sum(
+                        now - message.created for message in batch)
+                    if len(batch) > 1:
+                        self.digests += 1
+                else:
+                    self.dropped += len(batch)
+                ready_at = now + self.chat_interval
+            else:
+                ready_at = now + retry_after
+            if pending:
+                self._push(chat_id, ready_at)
+            else:
+                del self._chats[chat_id]
+                self._remember_cooldown(chat_id, ready_at, now)
+            self._condition.notify_all()
+        if retry_after is None:
+            self._report(batch, result)
+
+    def _report(self, batch, result):
+        for message in batch:
+            if message.callback is None:
+                continue
+            try:
+                message.callback(result)
+            except Exception:
+                logger.error('Сбой обработчика итога отправки',
+                             exc_info=True)
+
+    def _remember_cooldown(self, chat_id, ready_at, now):
+        if len(self._cooldown) >= COOLDOWN_PRUNE_SIZE:
+            self._cooldown = {
+                chat: ready for chat, ready in self._cooldown.items()
+                if ready > now}
+        self._cooldown[chat_id] = ready_at
+
+    def _deliver(self, batch):
+        """Отправляет сообщения одним сообщением Telegram.
+
+        Возвращает пару (задержка повтора или None, итог отправки).
+        Попытки считаются по первому сообщению пачки; любая ошибка,
+        кроме постоянных, повторяется до max_attempts попыток.
+        """
+        message = batch[0]
+        message.attempts += 1
+        try:
+            self._send(message.chat_id, DIGEST_SEPARATOR.join(
+                item.text for item in batch))
+        except telegram.error.RetryAfter as error:
+            logger.warning(
+                f'Превышен лимит Telegram для чата {message.chat_id}, '
+                f'повтор через {error.retry_after} с')
+            return error.retry_after, FAILED
+        except PERMANENT_ERRORS:
+            logger.error(
+                f'Сообщение в чат {message.chat_id} отброшено',
+                exc_info=True)
+            return None, REJECTED
+        except Exception:
+            if message.attempts < self.max_attempts:
+                logger.warning(
+                    f'Сбой при отправке в чат {message.chat_id}, '
+                    f'попытка {message.attempts}', exc_info=True)
+                return SEND_RETRY_TIME * 2 ** (message.attempts - 1), FAILED
+            logger.error(
+                f'Сообщение в чат {message.chat_id} не отправлено '
+                f'за {message.attempts} попыток', exc_info=True)
+            return None, FAILED
+        logger.info('Удачная отправка сообщения в Telegram')
+        return None, SENT
+
+    @metrics.timed('telegram_delivery')
+    def _send(self, chat_id, text):
+        self.bot.send_message(chat_id, text)
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            retry_after, result = SEND_RETRY_TIME, FAILED
+            try:
+                time.sleep(self.global_bucket.reserve())
+                retry_after, result = self._deliver(batch)
+            except Exception:
+                logger.error(
+                    f'Сбой при отправке в чат {batch[0].chat_id}',
+                    exc_info=True)
+            finally:
+                self._finish(batch, retry_after, result)
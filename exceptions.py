@@ -1,3 +1,18 @@
 class TelegramMessageException(Exception):
     """Исключение при отправке сообщения в Телеграм"""
     pass
+
+
+class UpstreamException(ConnectionError):
+    """Сбой эндпоинта API, учтённый предохранителем"""
+    pass
+
+
+class OutageException(UpstreamException):
+    """Сбой, после которого предохранитель API разомкнулся"""
+    pass
+
+
+class CircuitOpenException(UpstreamException):
+    """Запрос не отправлен: предохранитель API разомкнут"""
+    pass
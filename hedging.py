@@ -0,0 +1,185 @@
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+
+API_DEADLINE = float(os.getenv('API_DEADLINE', 60))
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', '0') == '1'
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', 0.95))
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.5))
+REQUEST_WORKERS = int(os.getenv('REQUEST_WORKERS', 20))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+MIN_READ_TIMEOUT = 0.01
+
+PRIMARY = 'primary'
+HEDGE = 'hedge'
+
+HEDGED_REQUESTS = metrics.Counter(
+    'homework_bot_hedged_requests_total',
+    'Запросы к API со страхующим повтором по победившей попытке',
+    labels=['winner'])
+DEADLINE_EXCEEDED = metrics.Counter(
+    'homework_bot_request_deadline_exceeded_total',
+    'Запросы к API, не уложившиеся в срок опроса')
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Скользящее окно длительностей последних удачных запросов."""
+
+    def __init__(self, window=LATENCY_WINDOW, min_samples=HEDGE_MIN_SAMPLES):
+        """Хранит до window длительностей; квантиль - от min_samples."""
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Учитывает длительность одного запроса."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q):
+        """Возвращает квантиль q окна или None, пока данных мало."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def close_response(future):
+    """Закрывает ответ проигравшей попытки и освобождает соединение."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class RequestExecutor:
+    """Выполняет запросы к API в пределах срока опроса.
+
+    Каждый вызов execute укладывается в deadline секунд: тайм-аут
+    чтения попытки урезается до остатка срока, а по его истечении
+    выбрасывается ConnectionError, даже если сокет ещё ждёт ответа.
+    С hedge=True попытка, которая длится дольше квантиля quantile
+    недавних запросов (но не меньше min_delay), страхуется второй такой
+    же. Побеждает первый удачный ответ, проигравшая попытка отменяется,
+    а если уже отправлена - её ответ закрывается по завершении.
+    """
+
+    def __init__(self, deadline=API_DEADLINE, hedge=HEDGE_REQUESTS,
+                 quantile=HEDGE_QUANTILE, min_delay=HEDGE_MIN_DELAY,
+                 workers=REQUEST_WORKERS, latencies=None,
+                 clock=time.monotonic):
+        """Создаёт пул из workers потоков для попыток запросов."""
+        self.deadline = deadline
+        self.hedge = hedge
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.latencies = latencies or LatencyTracker()
+        self.clock = clock
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='request')
+
+    def hedge_delay(self):
+        """Возвращает, через сколько секунд страховать запрос, или None."""
+        if not self.hedge:
+            return None
+        latency = self.latencies.quantile(self.quantile)
+        if latency is None:
+            return None
+        return max(self.min_delay, latency)
+
+    def execute(self, send, headers, params, session, timeout, stream=False):
+        """Выполняет send(headers, params, session, timeout, stream).
+
+        timeout - пара (connect, read) для одной попытки.
+        """
+        expires = self.clock() + self.deadline
+        attempts = [self._submit(
+            send, headers, params, session, timeout, stream, expires)]
+        delay = self.hedge_delay()
+        if delay is not None and delay < self.deadline:
+            done, _ = wait(attempts, timeout=delay)
+            if not done:
+                logger.debug(f'Запрос к API дольше {delay:.3f} с, '
+                             'отправлен страхующий')
+                attempts.append(self._submit(
+                    send, headers, params, session, timeout, stream,
+                    expires))
+        return self._first(attempts, expires)
+
+    def stats(self):
+        """Возвращает число застрахованных запросов и долю побед страховки."""
+        with self._lock:
+            return {
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'win_rate': (self.hedge_wins / self.hedged
+                             if self.hedged else 0),
+                'p95': self.latencies.quantile(0.95),
+            }
+
+    def close(self):
+        """Останавливает пул, не дожидаясь зависших попыток."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, send, headers, params, session, timeout, stream,
+                expires):
+        connect, read = timeout
+        started = self.clock()
+        read = max(MIN_READ_TIMEOUT, min(read, expires - started))
+        future = self._executor.submit(
+            send, headers, params, session, (connect, read), stream)
+        future.add_done_callback(functools.partial(self._observe, started))
+        return future
+
+    def _observe(self, started, future):
+        if not future.cancelled() and future.exception() is None:
+            self.latencies.observe(self.clock() - started)
+
+    def _first(self, attempts, expires):
+        pending = set(attempts)
+        error = None
+        while pending:
+            remaining = expires - self.clock()
+            if remaining <= 0:
+                break
+            done, pending = wait(
+                pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in attempts:
+                if future not in done:
+                    continue
+                if future.exception() is None:
+                    self._discard(pending)
+                    self._count(attempts, future)
+                    return future.result()
+                error = future.exception()
+        if pending:
+            self._discard(pending)
+            DEADLINE_EXCEEDED.inc()
+            raise ConnectionError(
+                f'Запрос к API не уложился в {self.deadline} с')
+        raise error
+
+    def _discard(self, futures):
+        for future in futures:
+            if not future.cancel():
+                future.add_done_callback(close_response)
+
+    def _count(self, attempts, winner):
+        if len(attempts) < 2:
+            return
+        won = winner is attempts[1]
+        HEDGED_REQUESTS.inc(HEDGE if won else PRIMARY)
+        with self._lock:
+            self.hedged += 1
+            self.hedge_wins += won
@@ -1,46 +1,84 @@
+import argparse
 import logging
 import os
 import sys
 import time
 from http import HTTPStatus
 
-import requests
-import telegram
-from dotenv import load_dotenv
-
+import circuit
 import exceptions
+import log_config
+import metrics
+import records
+import rendering
+import response_cache
+import scheduler
+import storage
+import tracker
+
+
+def find_env_file(name='.env'):
+    """Ищет файл .env в каталоге модуля и выше, как python-dotenv."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
 
-load_dotenv()
+def load_env():
+    """Загружает .env; python-dotenv импортируется, только если файл есть."""
+    path = find_env_file()
+    if path is not None:
+        from dotenv import load_dotenv
+        load_dotenv(path)
+
+
+load_env()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_TIME = 600
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 3.05))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 30))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+HTTP_RETRY_BACKOFF = 0.5
+HTTP_RETRY_STATUSES = (
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+)
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 RESPONSE_JSON_ERROR = ('Произошла ошибка {error_value}. Параметры: {error}'
                        '{url}, {headers}, {params}')
 
-HOMEWORK_VERDICTS = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
-}
-
 logger = logging.getLogger(__name__)
 
-logger.setLevel(logging.DEBUG)
-logger.setLevel(logging.INFO)
-logger.setLevel(logging.ERROR)
-logger.setLevel(logging.CRITICAL)
+http_session = None
+request_executor = None
 
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
+    send_message_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+@metrics.timed('send_message')
+def send_message_to_chat(bot, chat_id, message):
+    """Отправляет сообщение в указанный Telegram чат."""
+    import telegram
+
     try:
         logger.info('Отправка сообщения...')
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        bot.send_message(chat_id, message)
     except telegram.error.TelegramError:
         raise exceptions.TelegramMessageException(
             'Сбой при отправке сообщения в Telegram'
@@ -49,30 +87,181 @@ def send_message(bot, message):
         logger.info('Удачная отправка сообщения в Telegram')
 
 
+def create_session(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES):
+    """Создаёт HTTP-сессию с пулом keep-alive соединений и повторами."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def set_session(session):
+    """Задаёт HTTP-сессию, через которую get_api_answer делает запросы."""
+    global http_session
+    http_session = session
+
+
+def set_request_executor(executor):
+    """Задаёт hedging.RequestExecutor для всех запросов к API."""
+    global request_executor
+    request_executor = executor
+
+
 def get_api_answer(current_timestamp):
     """Делает запрос к эндпоинту API-сервиса."""
-    timestamp = current_timestamp or int(time.time())
-    params = {'from_date': timestamp}
+    return request_homework_statuses(
+        PRACTICUM_TOKEN, current_timestamp or int(time.time()),
+        session=http_session)
+
+
+def from_date(current_timestamp):
+    """Возвращает from_date запроса; None означает текущий момент."""
+    return int(time.time()) if current_timestamp is None else (
+        current_timestamp)
+
+
+@metrics.timed('get_api_answer')
+def request_homework_statuses(token, current_timestamp, session=None,
+                              timeout=None, cache=None, breaker=None):
+    """Делает запрос к эндпоинту API-сервиса с указанным токеном.
+
+    Без сессии запрос выполняется через модуль requests;
+    timeout - пара (connect, read) в секундах. С кешем ResponseCache
+    ответ, совпавший с предыдущим, возвращается как пустой список
+    работ без разбора JSON. breaker - общий circuit.CircuitBreaker.
+    Без current_timestamp запрашиваются изменения с текущего момента,
+    а 0 - вся история.
+    """
+    params = {'from_date': from_date(current_timestamp)}
+    headers = {'Authorization': f'OAuth {token}'}
+    if cache is not None:
+        headers.update(cache.conditional_headers(token))
+    response = send_api_request(
+        headers, params, session, timeout, breaker=breaker)
+    if cache is not None:
+        unchanged = cache.lookup(token, response)
+        if unchanged is not None:
+            logger.debug('Ответ API не изменился')
+            return unchanged
+    check_status_code(response)
+    try:
+        return response.json()
+    except ValueError as error:
+        raise ValueError(RESPONSE_JSON_ERROR.format(
+            error_value=type(error).__name__,
+            error=error,
+            url=ENDPOINT,
+            headers=list(headers),
+            params=params)
+        )
+
+
+@metrics.timed('get_api_answer')
+def stream_homework_statuses(token, current_timestamp, session=None,
+                             timeout=None, breaker=None):
+    """Делает запрос к API и возвращает работы потоком HomeworkStream.
+
+    Подходит для длинной истории работ: ответ не загружается
+    в память целиком.
+    """
+    params = {'from_date': from_date(current_timestamp)}
+    headers = {'Authorization': f'OAuth {token}'}
+    response = send_api_request(
+        headers, params, session, timeout, stream=True, breaker=breaker)
+    check_status_code(response)
+    import streaming
+
+    response.raw.decode_content = True
+    return streaming.HomeworkStream(response.raw)
+
+
+def send_api_request(headers, params, session=None, timeout=None,
+                     stream=False, breaker=None):
+    """Отправляет GET-запрос к ENDPOINT и возвращает ответ.
+
+    С предохранителем circuit.CircuitBreaker сбои соединения и ответы
+    5xx/429 учитываются в нём и выбрасываются как UpstreamException,
+    а пока предохранитель разомкнут, запрос не отправляется.
+    """
+    if breaker is None:
+        return send_request(headers, params, session, timeout, stream)
+    if not breaker.allow():
+        raise exceptions.CircuitOpenException(
+            'Эндпоинт API недоступен, опрос пропущен')
+    try:
+        response = send_request(headers, params, session, timeout, stream)
+    except ConnectionError as error:
+        raise_upstream_error(breaker, str(error))
+    if (response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            or response.status_code == HTTPStatus.TOO_MANY_REQUESTS):
+        raise_upstream_error(
+            breaker, f'Эндпоинт API ответил кодом {response.status_code}')
+    breaker.success()
+    return response
+
+
+def raise_upstream_error(breaker, error_message):
+    """Учитывает сбой в предохранителе и выбрасывает исключение."""
+    if breaker.failure():
+        raise exceptions.OutageException(
+            f'Эндпоинт API недоступен: {error_message}')
+    raise exceptions.UpstreamException(error_message)
+
+
+def send_request(headers, params, session=None, timeout=None, stream=False):
+    """Отправляет GET-запрос к ENDPOINT через исполнитель запросов.
+
+    Исполнитель, заданный set_request_executor, ограничивает общее
+    время запроса и страхует медленные запросы повтором. Без него
+    выполняется одна попытка send_unguarded_request.
+    """
+    if request_executor is None:
+        return send_unguarded_request(
+            headers, params, session, timeout, stream)
+    return request_executor.execute(
+        send_unguarded_request, headers, params, session,
+        timeout or (API_CONNECT_TIMEOUT, API_READ_TIMEOUT), stream)
+
+
+def send_unguarded_request(headers, params, session=None, timeout=None,
+                           stream=False):
+    """Отправляет GET-запрос к ENDPOINT без предохранителя."""
+    import requests
+
+    client = session or requests
+    if timeout is None:
+        timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
     try:
         logger.info(
             f'Делаем запрос к endpoint {ENDPOINT};'
             f'Параметры: {params}')
-        response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        return client.get(
+            ENDPOINT, headers=headers, params=params, timeout=timeout,
+            stream=stream)
     except Exception as error:
         error_message = f'Endpoint error: {error}'
         raise ConnectionError(error_message)
+
+
+def check_status_code(response):
+    """Проверяет, что API ответил кодом 200."""
     if response.status_code != HTTPStatus.OK:
         error_message = 'При запросе к ENDPOINT код ответа не равен 200'
         raise ConnectionError(error_message)
-    try:
-        response_json = response.json()
-    except Exception as error:
-        raise ValueError(RESPONSE_JSON_ERROR.format(
-            error_value=response_json[error],
-            error=error)
-        )
 
 
+@metrics.timed('check_response')
 def check_response(response):
     """Проверяет ответ API."""
     if not response:
@@ -87,21 +276,29 @@ def check_response(response):
     return homeworks
 
 
+def check_homeworks(response):
+    """Проверяет ответ API и возвращает работы как записи Homework."""
+    statuses = rendering.statuses()
+    return [records.Homework.from_dict(homework, statuses)
+            for homework in check_response(response)]
+
+
 def parse_status(homework):
-    """Извлекает информацию о конкретной домашней работе."""
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    if homework_name is None or homework_status is None:
-        raise KeyError(
-            'В ответе отсутствует имя работы или статус '
-            f'статус: {homework_status}, имя работы: {homework_name}')
-
-    verdict = HOMEWORK_VERDICTS.get(homework_status)
-    if verdict is None:
-        raise ValueError(
-            f'Такого {homework_status} статуса нет'
-        )
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    """Извлекает информацию о конкретной домашней работе.
+
+    Принимает запись records.Homework или словарь из ответа API;
+    словарь предварительно проверяется.
+    """
+    return render_status(homework)
+
+
+@metrics.timed('parse_status')
+def render_status(homework, locale=None):
+    """Возвращает уведомление о статусе работы на языке locale."""
+    if not isinstance(homework, records.Homework):
+        homework = records.Homework.from_dict(homework, rendering.statuses())
+    return rendering.render(
+        homework.name, records.status_value(homework.status), locale)
 
 
 def check_tokens():
@@ -109,28 +306,126 @@ def check_tokens():
     return all([TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, PRACTICUM_TOKEN])
 
 
+def handle_upstream_error(bot, error, schedule, breaker):
+    """Возвращает задержку после сбоя API, учтённого предохранителем.
+
+    Об отказе API сообщается один раз - когда размыкается
+    предохранитель; пока он разомкнут, опросы пропускаются.
+    Задержка вычисляется до отправки сообщения, так что сбой
+    отправки не прерывает цикл опроса.
+    """
+    if isinstance(error, exceptions.CircuitOpenException):
+        logger.debug(f'Опрос пропущен: {error}')
+        return schedule.postpone(breaker.retry_after())
+    logger.warning(f'Сбой API: {error}')
+    delay = schedule.failure()
+    if isinstance(error, exceptions.OutageException):
+        try:
+            send_message(bot, f'Сбой в работе программы: {error}')
+        except exceptions.TelegramMessageException:
+            logger.error('Сообщение об отказе API не отправлено',
+                         exc_info=True)
+    return delay
+
+
+def check_config():
+    """Проверяет токены и настройки, не загружая сетевые библиотеки.
+
+    Возвращает список найденных проблем; пустой список - всё в порядке.
+    """
+    problems = []
+    if not check_tokens():
+        problems.append('Отсутствуют обязательные переменные окружения')
+    try:
+        rendering.load_locale(rendering.DEFAULT_LOCALE)
+    except (OSError, ValueError, KeyError) as error:
+        problems.append(f'Не загружается локаль по умолчанию: {error}')
+    state_dir = os.path.dirname(os.path.abspath(storage.STATE_DB))
+    if not os.access(state_dir, os.W_OK):
+        problems.append(f'Нет доступа на запись в каталог {state_dir}')
+    return problems
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки бота."""
+    parser = argparse.ArgumentParser(
+        description='Бот-ассистент для проверки статуса домашней работы')
+    parser.add_argument(
+        '--check', action='store_true',
+        help='только проверить токены и настройки и выйти')
+    return parser.parse_args(argv)
+
+
 def main():
-    """Основная логика работы бота."""
+    """Основная логика работы бота.
+
+    Команды бота здесь не принимаются: getUpdates у токена может
+    читать только один процесс, и команды принимает poller.py.
+    """
+    import telegram
+
+    import delivery
+    import hedging
+    import outbox
+    import profiling
+
     if not check_tokens():
         logger.critical('Отсутствуют обязательные переменные окружения')
         sys.exit('Программа остановлена')
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    prev_status = ''
+    bot = delivery.OutboundQueue(telegram.Bot(token=TELEGRAM_TOKEN), workers=1)
+    bot.start()
+    bot.register_metrics()
+    metrics.start_server()
+    set_session(create_session())
+    set_request_executor(hedging.RequestExecutor())
+    cache = response_cache.ResponseCache()
+    breaker = circuit.CircuitBreaker()
+    store = storage.StateStore()
+    account = storage.account_key(PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)
+    relay = outbox.OutboxRelay(store, bot, accounts=[account])
+    relay.start()
+    current_timestamp = store.load_checkpoint(account) or int(time.time())
+    states = tracker.HomeworkStates(store.load_statuses(account))
+    schedule = scheduler.PollSchedule(retry_time=RETRY_TIME)
+    profiler = profiling.Profiler()
+    profiler.install_signal()
     prev_message = ''
 
     while True:
+        delay = None
+        metrics.POLL_LAG.observe(
+            max(0, time.monotonic() - schedule.next_run))
         try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-            current_status = parse_status(homeworks[0])
-            if current_status != prev_status:
-                prev_status = current_status
-                send_message(bot, current_status)
-            current_timestamp = response.get('current_date')
-            logger.debug('Статус не изменился')
+            with profiler.iteration():
+                response = request_homework_statuses(
+                    PRACTICUM_TOKEN, current_timestamp,
+                    session=http_session, cache=cache, breaker=breaker)
+                homeworks = check_homeworks(response)
+                transitions = states.diff(homeworks)
+                notifications = [
+                    outbox.OutboxEntry(
+                        TELEGRAM_CHAT_ID, transition.key,
+                        transition.new_status,
+                        parse_status(transition.homework))
+                    for transition in transitions]
+                changes = states.apply(transitions)
+                current_timestamp = response.get(
+                    'current_date', current_timestamp)
+                store.save_poll(
+                    account, current_timestamp, changes, transitions,
+                    notifications)
+                relay.wake()
+                delay = schedule.success(states)
+                if not notifications:
+                    logger.debug('Статус не изменился')
 
+        except exceptions.UpstreamException as error:
+            cache.forget(PRACTICUM_TOKEN)
+            delay = handle_upstream_error(bot, error, schedule, breaker)
         except Exception as error:
+            if delay is None:
+                delay = schedule.failure()
+                cache.forget(PRACTICUM_TOKEN)
             message = f'Сбой в работе программы: {error}'
             if prev_message != message:
                 prev_message = message
@@ -139,16 +434,15 @@ def main():
                 'Сбой при отправке сообщения в Telegram',
                 exc_info=True)
         finally:
-            time.sleep(RETRY_TIME)
+            logger.debug(f'Следующий опрос через {delay:.0f} с')
+            time.sleep(delay)
 
 
 if __name__ == '__main__':
-    log_format = ('%(asctime)s [%(levelname)s] | '
-                  'func: %(funcName)s / line: %(lineno)d | %(message)s')
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format=log_format,
-        handlers=[logging.FileHandler(filename='main.log', mode='a'),
-                  logging.StreamHandler()]
-    )
+    if parse_args().check:
+        problems = check_config()
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        sys.exit(1 if problems else 0)
+    log_config.configure_logging()
     main()
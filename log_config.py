@@ -0,0 +1,82 @@
+import atexit
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+
+LOG_LEVEL = 'INFO'
+LOG_FILE = 'main.log'
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_FORMAT = ('%(asctime)s [%(levelname)s] | '
+              'func: %(funcName)s / line: %(lineno)d | %(message)s')
+
+
+def gzip_namer(name):
+    """Добавляет расширение .gz к имени архивного файла лога."""
+    return f'{name}.gz'
+
+
+def gzip_rotator(source, dest):
+    """Сжимает файл лога при ротации."""
+    with open(source, 'rb') as source_file:
+        with gzip.open(dest, 'wb') as dest_file:
+            shutil.copyfileobj(source_file, dest_file)
+    os.remove(source)
+
+
+class LogListener(logging.handlers.QueueListener):
+    """QueueListener, который можно безопасно остановить повторно."""
+
+    def stop(self):
+        """Дописывает оставшиеся записи и останавливает поток."""
+        if self._thread is not None:
+            super().stop()
+
+
+def create_file_handler(filename):
+    """Создаёт обработчик файла лога с ротацией и сжатием архивов.
+
+    Если задана LOG_ROTATE_WHEN, файл ротируется по времени,
+    иначе по размеру LOG_MAX_BYTES.
+    """
+    when = os.getenv('LOG_ROTATE_WHEN')
+    max_bytes = int(os.getenv('LOG_MAX_BYTES', LOG_MAX_BYTES))
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', LOG_BACKUP_COUNT))
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            filename, when=when, backupCount=backup_count, encoding='utf-8')
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count,
+            encoding='utf-8')
+    handler.namer = gzip_namer
+    handler.rotator = gzip_rotator
+    return handler
+
+
+def configure_logging(level=None, filename=None):
+    """Настраивает асинхронный вывод логов в файл и в консоль.
+
+    Вызывающий поток только кладёт запись в очередь, запись на диск
+    и в консоль выполняет отдельный поток QueueListener. Уровень и файл
+    по умолчанию берутся из LOG_LEVEL и LOG_FILE.
+    Возвращает запущенный QueueListener.
+    """
+    level = (level or os.getenv('LOG_LEVEL', LOG_LEVEL)).upper()
+    filename = filename or os.getenv('LOG_FILE', LOG_FILE)
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [create_file_handler(filename), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    listener = LogListener(
+        records, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
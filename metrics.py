@@ -0,0 +1,239 @@
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+LATENCY_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+def format_labels(names, values, extra=''):
+    """Форматирует метки метрики в синтаксисе Prometheus."""
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    """Форматирует число для текстового формата Prometheus."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Набор метрик, которые отдаются эндпоинтом /metrics."""
+
+    def __init__(self):
+        """Создаёт пустой набор метрик."""
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику в набор и возвращает её."""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    """Монотонно растущий счётчик с метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=(), registry=REGISTRY):
+        """Создаёт счётчик и регистрирует его в registry."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, *label_values, amount=1):
+        """Увеличивает счётчик для набора значений меток."""
+        with self._lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount)
+
+    def value(self, *label_values):
+        """Возвращает текущее значение счётчика."""
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        """Возвращает строки метрики для /metrics."""
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f'{self.name}{format_labels(self.labels, values)} '
+            f'{format_value(value)}'
+            for values, value in items
+        ]
+
+
+class Gauge:
+    """Мгновенное значение, вычисляемое при каждом запросе /metrics."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, registry=REGISTRY):
+        """Создаёт метрику, значение которой возвращает callback."""
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        registry.register(self)
+
+    def samples(self):
+        """Возвращает строки метрики для /metrics."""
+        return [f'{self.name} {format_value(self.callback())}']
+
+
+class Histogram:
+    """Распределение значений по корзинам с метками."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(),
+                 buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        """Создаёт гистограмму с границами корзин buckets."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value, *label_values):
+        """Учитывает одно наблюдение."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, *label_values):
+        """Возвращает число наблюдений."""
+        state = self._values.get(label_values)
+        return state[2] if state else 0
+
+    def samples(self):
+        """Возвращает строки метрики для /metrics."""
+        with self._lock:
+            items = [(values, (list(state[0]), state[1], state[2]))
+                     for values, state in self._values.items()]
+        lines = []
+        for values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                    self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = format_labels(
+                    self.labels, values, f'le="{format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labels, values)
+            lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+STAGE_DURATION = Histogram(
+    'homework_bot_stage_duration_seconds',
+    'Длительность этапов опроса', labels=['stage'])
+ERRORS = Counter(
+    'homework_bot_errors_total',
+    'Ошибки этапов опроса по типу исключения', labels=['stage', 'error'])
+POLL_LAG = Histogram(
+    'homework_bot_poll_lag_seconds',
+    'Опоздание опроса относительно запланированного времени')
+NOTIFICATIONS_SENT = Counter(
+    'homework_bot_notifications_sent_total',
+    'Сообщения, доставленные в Telegram')
+
+
+def timed(stage):
+    """Декоратор: измеряет длительность этапа и считает его ошибки."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                ERRORS.inc(stage, type(error).__name__)
+                raise
+            finally:
+                STAGE_DURATION.observe(time.perf_counter() - start, stage)
+        return wrapper
+    return decorator
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаёт метрики реестра по адресу /metrics."""
+
+    registry = REGISTRY
+
+    def do_GET(self):
+        """Отвечает на GET /metrics, остальные пути - 404."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Пишет журнал запросов в лог на уровне DEBUG."""
+        logger.debug(f'metrics: {format % args}')
+
+
+def start_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Запускает HTTP-сервер /metrics в фоновом потоке.
+
+    Если порт не задан или уже занят (например, другим воркером
+    на той же машине), сервер не запускается и возвращается None.
+    """
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as error:
+        logger.warning(f'Сервер метрик не запущен на {host}:{port}: {error}')
+        return None
+    thread = threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True)
+    thread.start()
+    logger.info(f'Метрики доступны на http://{host}:{port}/metrics')
+    return server
@@ -0,0 +1,204 @@
+import functools
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import delivery
+import exceptions
+import metrics
+import sharding
+
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 500))
+OUTBOX_COMMIT_INTERVAL = float(os.getenv('OUTBOX_COMMIT_INTERVAL', 0.5))
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 5))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 10))
+OUTBOX_RETRY_TIME = 30
+DIGEST_URGENT_STATUSES = frozenset(filter(None, os.getenv(
+    'DIGEST_URGENT_STATUSES', 'approved').split(',')))
+OUTBOX_MAX_RETRY_TIME = 3600
+
+OUTBOX_RESULTS = metrics.Counter(
+    'homework_bot_outbox_results_total',
+    'Итоги отправки уведомлений из исходящего ящика',
+    labels=['result'])
+
+OutboxEntry = namedtuple(
+    'OutboxEntry', ['chat_id', 'homework', 'status', 'text'])
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    """Доставляет уведомления из исходящего ящика StateStore.
+
+    Уведомления записываются в ящик вместе с новыми статусами и
+    уникальны по (учётная запись, работа, статус). Релей выбирает
+    созревшие записи, ставит их в delivery.OutboundQueue и собирает
+    итоги: отправленные и отклонённые Telegram записи удаляются,
+    остальные откладываются с экспоненциальной задержкой. Итоги
+    фиксируются пачками раз в commit_interval секунд; запись остаётся
+    «в отправке» до фиксации, поэтому повторно в очередь не попадает.
+    После падения неподтверждённые записи отправляются снова.
+    Уведомления со статусами urgent_statuses ставятся в очередь
+    срочными и не ждут окна дайджеста.
+
+    С координатором sharding.ShardCoordinator релей отправляет только
+    записи учётных записей своих шардов и удерживает шард, пока итог
+    отправки не зафиксирован. С accounts релей берёт из ящика только
+    записи этих учётных записей, а с координатором - только тех
+    из них, чьи шарды арендованы сейчас, поэтому процессы с общей
+    базой не отправляют одно уведомление дважды и не упираются
+    в чужие записи.
+    """
+
+    def __init__(self, store, queue, batch_size=OUTBOX_BATCH_SIZE,
+                 commit_interval=OUTBOX_COMMIT_INTERVAL,
+                 poll_interval=OUTBOX_POLL_INTERVAL,
+                 max_attempts=OUTBOX_MAX_ATTEMPTS, coordinator=None,
+                 urgent_statuses=DIGEST_URGENT_STATUSES, accounts=None,
+                 clock=time.time):
+        """Настраивает релей ящика store в очередь queue."""
+        self.store = store
+        self.queue = queue
+        self.coordinator = coordinator
+        self.accounts = None if accounts is None else list(accounts)
+        self._owned_shards = None
+        self._owned_accounts = None
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.urgent_statuses = urgent_statuses
+        self.clock = clock
+        self._in_flight = {}
+        self._done = []
+        self._retries = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def wake(self):
+        """Сообщает релею о новых записях в ящике."""
+        self._wake.set()
+
+    def start(self):
+        """Запускает фоновый поток релея."""
+        self._thread = threading.Thread(
+            target=self._run, name='outbox', daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=None):
+        """Останавливает релей и фиксирует полученные итоги."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def relay(self):
+        """Фиксирует итоги и ставит созревшие записи в очередь.
+
+        Возвращает число записей, поставленных в очередь.
+        """
+        self.flush()
+        with self._lock:
+            room = self.batch_size - len(self._in_flight)
+            exclude = set(self._in_flight)
+        if room <= 0:
+            return 0
+        queued = 0
+        for entry_id, account, chat_id, status, text, attempts in (
+                self.store.load_outbox(
+                    self.clock(), room, exclude, self.owned_accounts())):
+            if (self.coordinator is not None
+                    and not self.coordinator.acquire(account)):
+                continue
+            with self._lock:
+                self._in_flight[entry_id] = (attempts, account)
+            try:
+                self.queue.put(
+                    chat_id, text,
+                    callback=functools.partial(self._complete, entry_id),
+                    urgent=status in self.urgent_statuses)
+            except exceptions.TelegramMessageException:
+                self._forget([entry_id])
+                logger.warning('Очередь отправки заполнена, '
+                               'уведомления подождут в ящике')
+                break
+            queued += 1
+        return queued
+
+    def owned_accounts(self):
+        """Возвращает учётные записи, чьи уведомления отправляет релей.
+
+        С координатором список пересчитывается, только когда меняется
+        набор арендованных шардов.
+        """
+        if self.coordinator is None or self.accounts is None:
+            return self.accounts
+        owned = self.coordinator.owned
+        if owned is not self._owned_shards:
+            self._owned_accounts = [
+                account for account in self.accounts
+                if sharding.shard_of(
+                    account, self.coordinator.shard_count) in owned]
+            self._owned_shards = owned
+        return self._owned_accounts
+
+    def flush(self):
+        """Фиксирует накопленные итоги отправки одной транзакцией."""
+        with self._lock:
+            done, self._done = self._done, []
+            retries, self._retries = self._retries, []
+        if not done and not retries:
+            return
+        try:
+            self.store.complete_outbox(done, retries)
+        except Exception:
+            with self._lock:
+                self._done.extend(done)
+                self._retries.extend(retries)
+            raise
+        self._forget(done + [entry_id for entry_id, _ in retries])
+
+    def _forget(self, entry_ids):
+        with self._lock:
+            entries = [self._in_flight.pop(entry_id, None)
+                       for entry_id in entry_ids]
+        if self.coordinator is not None:
+            for entry in entries:
+                if entry is not None:
+                    self.coordinator.release(entry[1])
+
+    def _complete(self, entry_id, result):
+        with self._lock:
+            attempts = self._in_flight.get(entry_id, (0, None))[0] + 1
+            if result == delivery.FAILED and attempts < self.max_attempts:
+                delay = min(OUTBOX_MAX_RETRY_TIME,
+                            OUTBOX_RETRY_TIME * 2 ** (attempts - 1))
+                self._retries.append((entry_id, self.clock() + delay))
+            else:
+                self._done.append(entry_id)
+        OUTBOX_RESULTS.inc(result)
+        if result == delivery.FAILED and attempts >= self.max_attempts:
+            logger.error(f'Уведомление {entry_id} не доставлено '
+                         f'за {attempts} попыток и удалено из ящика')
+
+    def _run(self):
+        while True:
+            with self._lock:
+                busy = bool(self._in_flight)
+            self._wake.wait(
+                self.commit_interval if busy else self.poll_interval)
+            self._wake.clear()
+            closed = self._closed
+            try:
+                if closed:
+                    self.flush()
+                    return
+                self.relay()
+            except Exception:
+                logger.error('Сбой исходящего ящика', exc_info=True)
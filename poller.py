@@ -0,0 +1,493 @@
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import telegram
+from telegram.utils.request import Request
+
+import backfill
+import circuit
+import coalesce
+import commands
+import delivery
+import exceptions
+import hedging
+import homework
+import log_config
+import metrics
+import outbox
+import profiling
+import records
+import rendering
+import response_cache
+import scheduler
+import sharding
+import storage
+import timing_wheel
+import tracker
+
+ACCOUNTS_FILE = os.getenv('ACCOUNTS_FILE', 'accounts.json')
+POLL_CONCURRENCY = int(os.getenv('POLL_CONCURRENCY', 100))
+STREAMING_AGE = int(os.getenv('STREAMING_AGE', 0))
+ALERT_CHAT_ID = os.getenv('ALERT_CHAT_ID')
+POLL_SPREAD = float(os.getenv('POLL_SPREAD', scheduler.RETRY_TIME))
+
+logger = logging.getLogger(__name__)
+
+
+class Account:
+    """Учётная запись: токен Практикума и чат для уведомлений."""
+
+    def __init__(self, token, chat_id, locale=None):
+        """Создаёт учётную запись; опрос начинается с текущего момента."""
+        self.token = token
+        self.chat_id = chat_id
+        self.locale = locale
+        self.key = storage.account_key(token, chat_id)
+        self.current_timestamp = int(time.time())
+        self.states = tracker.HomeworkStates()
+        self.prev_message = ''
+        self.schedule = scheduler.PollSchedule()
+
+    def restore(self, store):
+        """Загружает сохранённые метку времени и статусы работ."""
+        checkpoint = store.load_checkpoint(self.key)
+        if checkpoint:
+            self.current_timestamp = checkpoint
+        self.states = tracker.HomeworkStates(store.load_statuses(self.key))
+
+    def __repr__(self):
+        """Описывает запись для логов без токена."""
+        return f'Account(chat_id={self.chat_id})'
+
+
+def load_accounts(path):
+    """Загружает учётные записи из JSON-файла."""
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise TypeError('Файл учётных записей должен содержать список')
+    accounts = []
+    for item in data:
+        token = item.get('token')
+        chat_id = item.get('chat_id')
+        if not token or not chat_id:
+            raise KeyError(
+                'В учётной записи отсутствует токен или chat_id '
+                f'chat_id: {chat_id}')
+        accounts.append(Account(token, chat_id, item.get('locale')))
+    return accounts
+
+
+def command_chats(accounts):
+    """Группирует учётные записи по чатам для команд бота."""
+    chats = {}
+    for account in accounts:
+        chats.setdefault(str(account.chat_id), []).append(
+            commands.ChatAccount(account.key, account.locale))
+    return chats
+
+
+def notify(bot, account, message, chat_id=None):
+    """Отправляет сообщение в чат учётной записи, не прерывая опрос."""
+    try:
+        homework.send_message_to_chat(
+            bot, chat_id or account.chat_id, message)
+    except exceptions.TelegramMessageException:
+        logger.error(
+            f'Сбой при отправке сообщения в Telegram: {account}',
+            exc_info=True)
+        return False
+    return True
+
+
+def fetch_transitions(accounts, session=None, cache=None, breaker=None):
+    """Запрашивает работы токена и возвращает переходы каждой подписки.
+
+    accounts - учётные записи с общим токеном. Запрос идёт один раз
+    с самой ранней из их меток времени, а ответ сравнивается
+    со статусами каждой подписки. Если подписка одна, задана
+    STREAMING_AGE и метка времени старше STREAMING_AGE секунд, ответ
+    может быть длинным, и работы читаются потоком.
+    Возвращает пару (переходы по подпискам, current_date).
+    """
+    from_date = min(account.current_timestamp for account in accounts)
+    age = time.time() - from_date
+    if STREAMING_AGE and age > STREAMING_AGE and len(accounts) == 1:
+        account, = accounts
+        stream = homework.stream_homework_statuses(
+            account.token, from_date, session=session, breaker=breaker)
+        homeworks = (records.Homework.from_dict(item, rendering.statuses())
+                     for item in stream)
+        return [account.states.diff_stream(homeworks)], stream.current_date
+    response = homework.request_homework_statuses(
+        accounts[0].token, from_date, session=session, cache=cache,
+        breaker=breaker)
+    homeworks = homework.check_homeworks(response)
+    return ([account.states.diff(homeworks) for account in accounts],
+            response.get('current_date'))
+
+
+def apply_transitions(bot, account, transitions, current_date, store=None,
+                      relay=None):
+    """Применяет переходы учётной записи и отправляет уведомления.
+
+    С релеем outbox.OutboxRelay уведомления записываются в исходящий
+    ящик хранилища вместе со статусами и отправляются релеем.
+    """
+    messages = [
+        homework.render_status(transition.homework, account.locale)
+        for transition in transitions]
+    changes = account.states.apply(transitions)
+    account.current_timestamp = current_date or account.current_timestamp
+    if store is not None and relay is not None:
+        store.save_poll(
+            account.key, account.current_timestamp, changes, transitions,
+            [outbox.OutboxEntry(account.chat_id, transition.key,
+                                transition.new_status, message)
+             for transition, message in zip(transitions, messages)])
+        relay.wake()
+        return
+    if store is not None:
+        store.save_poll(
+            account.key, account.current_timestamp, changes, transitions)
+    for message in messages:
+        notify(bot, account, message)
+
+
+def poll_token(bot, accounts, session=None, store=None, cache=None,
+               breaker=None, relay=None):
+    """Выполняет один опрос API для всех подписок на токен.
+
+    Ответ раздаётся каждой подписке: статусы, метка времени
+    и уведомления у неё свои. Расписание токена - расписание первой
+    подписки. Возвращает задержку до следующего опроса токена.
+    """
+    lead = accounts[0]
+    metrics.POLL_LAG.observe(
+        max(0, time.monotonic() - lead.schedule.next_run))
+    coalesce.count_shared(accounts)
+    try:
+        transitions, current_date = fetch_transitions(
+            accounts, session, cache, breaker)
+        for account, changed in zip(accounts, transitions):
+            apply_transitions(
+                bot, account, changed, current_date, store, relay)
+    except exceptions.UpstreamException as error:
+        return handle_upstream_error(bot, lead, error, breaker, cache)
+    except Exception as error:
+        message = f'Сбой в работе программы: {error}'
+        logger.error(f'Сбой при опросе {accounts}', exc_info=True)
+        if cache is not None:
+            cache.forget(lead.token)
+        for account in accounts:
+            if account.prev_message != message:
+                account.prev_message = message
+                notify(bot, account, message)
+        return lead.schedule.failure()
+    return lead.schedule.success(min(
+        (account.states for account in accounts),
+        key=lead.schedule.interval))
+
+
+def poll_account(bot, account, session=None, store=None, cache=None,
+                 breaker=None, relay=None):
+    """Выполняет один опрос API для учётной записи.
+
+    Возвращает задержку до следующего опроса этой учётной записи.
+    """
+    return poll_token(
+        bot, [account], session, store, cache, breaker, relay)
+
+
+def handle_upstream_error(bot, account, error, breaker, cache=None):
+    """Обрабатывает сбой API, учтённый общим предохранителем.
+
+    Об общем сбое сообщается один раз за время недоступности API
+    в ALERT_CHAT_ID; без него сбой только пишется в лог, чтобы
+    сообщение не досталось случайному студенту, опрос которого
+    разомкнул предохранитель. Возвращает задержку до следующего опроса.
+    """
+    if isinstance(error, exceptions.CircuitOpenException):
+        logger.debug(f'Опрос {account} пропущен: {error}')
+        return account.schedule.postpone(breaker.retry_after())
+    logger.warning(f'Сбой API при опросе {account}: {error}')
+    if cache is not None:
+        cache.forget(account.token)
+    if isinstance(error, exceptions.OutageException):
+        logger.error(f'Предохранитель API разомкнут: {error}')
+        if ALERT_CHAT_ID:
+            notify(bot, account, f'Сбой в работе программы: {error}',
+                   chat_id=ALERT_CHAT_ID)
+    return account.schedule.failure()
+
+
+class Poller:
+    """Опрашивает API для множества учётных записей в одном event loop.
+
+    Блокирующие запросы выполняются в пуле потоков через общую
+    keep-alive сессию, а число одновременных запросов ограничено
+    семафором. Вместо бота можно передать delivery.OutboundQueue,
+    тогда уведомления отправляются с учётом лимитов Telegram.
+
+    Учётные записи с общим токеном опрашиваются одной группой
+    coalesce.group_by_token с одним таймером и одним расписанием:
+    запросов к API столько, сколько разных токенов, а не подписок.
+
+    С координатором sharding.ShardCoordinator в колесе стоят только
+    токены шардов, арендованных этим воркером: sync_shards добавляет
+    и снимает их при смене аренд, а при смене владельца состояние
+    перечитывается из общего хранилища.
+
+    Опросы запускает одно колесо таймеров timing_wheel.TimingWheel,
+    а не отдельная задача со sleep на каждый токен. Первые опросы
+    равномерно распределены по spread секундам, чтобы токены
+    не опрашивались одной волной.
+    """
+
+    def __init__(self, bot, accounts, concurrency=POLL_CONCURRENCY,
+                 session=None, store=None, cache=None, breaker=None,
+                 coordinator=None, relay=None, profiler=None,
+                 spread=POLL_SPREAD, tick=timing_wheel.WHEEL_TICK):
+        """Настраивает опрос accounts не более чем в concurrency потоков."""
+        self.bot = bot
+        self.accounts = accounts
+        self.concurrency = concurrency
+        self.session = session
+        self.store = store
+        self.cache = cache
+        self.breaker = breaker
+        self.coordinator = coordinator
+        self.relay = relay
+        self.profiler = profiler or profiling.Profiler(enabled=False, slow=0)
+        self.spread = spread
+        self.tick = tick
+        self.wheel = None
+        self.groups = coalesce.group_by_token(accounts)
+        self._shard_groups = {}
+        if coordinator is not None:
+            for group in self.groups:
+                self._shard_groups.setdefault(sharding.shard_of(
+                    group[0].key, coordinator.shard_count), []).append(group)
+        self._wheel_shards = set()
+        self._timers = {}
+        self._owned = {}
+        self._tasks = set()
+        self._semaphore = None
+        self._executor = None
+
+    async def poll(self, accounts):
+        """Опрашивает подписки токена с учётом лимита параллельности.
+
+        Возвращает задержку до следующего опроса.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await loop.run_in_executor(
+                self._executor, self._poll_token, accounts)
+
+    def _poll_token(self, accounts):
+        with self.profiler.iteration(str(accounts[0])):
+            return poll_token(
+                self.bot, accounts, self.session, self.store, self.cache,
+                self.breaker, self.relay)
+
+    async def poll_owned(self, accounts, owned):
+        """Опрашивает подписки токена, если их шард принадлежит воркеру.
+
+        Все подписки токена лежат в одном шарде. owned - владел ли
+        воркер ими при прошлом опросе. Возвращает пару (задержка,
+        владеет ли сейчас).
+        """
+        key = accounts[0].key
+        if not self.coordinator.acquire(key):
+            return self.coordinator.refresh_interval, False
+        try:
+            if not owned and self.store is not None:
+                for account in accounts:
+                    account.restore(self.store)
+            return await self.poll(accounts), True
+        finally:
+            self.coordinator.release(key)
+
+    async def poll_due(self, accounts):
+        """Опрашивает подписки токена и ставит следующий опрос в колесо."""
+        key = accounts[0].key
+        delay = scheduler.ERROR_RETRY_TIME
+        try:
+            if self.coordinator is None:
+                delay = await self.poll(accounts)
+            else:
+                delay, self._owned[key] = await self.poll_owned(
+                    accounts, self._owned.get(key, False))
+        except Exception:
+            logger.error(f'Сбой опроса {accounts}', exc_info=True)
+        finally:
+            timer = self._timers.get(key)
+            if timer is not None and not timer.active:
+                self._schedule(accounts, delay)
+
+    def start_wheel(self):
+        """Создаёт колесо и распределяет по нему первые опросы токенов.
+
+        С координатором колесо остаётся пустым до первого sync_shards.
+        """
+        self.wheel = timing_wheel.TimingWheel(self.tick)
+        if self.coordinator is None:
+            self._place(self.groups)
+
+    def sync_shards(self, owned):
+        """Приводит колесо к шардам owned, арендованным воркером.
+
+        Токены новых шардов ставятся в колесо с разбросом spread,
+        а таймеры токенов отданных шардов отменяются; опрос, который
+        уже идёт, после завершения в колесо не возвращается.
+        """
+        owned = set(owned)
+        for shard in self._wheel_shards - owned:
+            for accounts in self._shard_groups.get(shard, ()):
+                key = accounts[0].key
+                timer = self._timers.pop(key, None)
+                if timer is not None:
+                    self.wheel.cancel(timer)
+                self._owned.pop(key, None)
+        added = [accounts for shard in owned - self._wheel_shards
+                 for accounts in self._shard_groups.get(shard, ())]
+        self._wheel_shards = owned
+        self._place(added)
+
+    def _place(self, groups):
+        for accounts, delay in zip(groups, timing_wheel.phases(
+                len(groups), self.spread)):
+            self._schedule(accounts, delay)
+
+    def _schedule(self, accounts, delay):
+        accounts[0].schedule.next_run = self.wheel.clock() + delay
+        self._timers[accounts[0].key] = self.wheel.schedule(delay, accounts)
+
+    async def _dispatch(self):
+        while True:
+            for accounts in self.wheel.advance():
+                task = asyncio.create_task(self.poll_due(accounts))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            await asyncio.sleep(max(
+                0, self.wheel.next_tick_at() - self.wheel.clock()))
+
+    async def _refresh_shards(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                owned = await loop.run_in_executor(
+                    None, self.coordinator.refresh)
+                self.sync_shards(owned)
+                logger.debug(f'Шардов у воркера: {len(owned)}, '
+                             f'токенов в колесе: {len(self.wheel)}')
+            except Exception:
+                logger.error('Не удалось продлить аренду шардов',
+                             exc_info=True)
+            await asyncio.sleep(self.coordinator.refresh_interval)
+
+    async def run(self):
+        """Запускает бесконечный опрос всех учётных записей."""
+        if self.store is not None and self.coordinator is None:
+            for account in self.accounts:
+                account.restore(self.store)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.start_wheel()
+        tasks = [self._dispatch()]
+        if self.coordinator is not None:
+            tasks.append(self._refresh_shards())
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            self._executor = executor
+            await asyncio.gather(*tasks)
+
+
+def parse_args(argv=None):
+    """Разбирает аргументы командной строки poller."""
+    parser = argparse.ArgumentParser(
+        description='Опрос учётных записей из ACCOUNTS_FILE')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--shard', action='store_true',
+        help='опрашивать только шарды, арендованные этим воркером')
+    mode.add_argument(
+        '--commands', action='store_true',
+        help='только отвечать на команды бота, без опроса')
+    mode.add_argument(
+        '--backfill', action='store_true',
+        help='загрузить историю статусов и выйти')
+    parser.add_argument(
+        '--since', type=int, default=0,
+        help='начало истории для --backfill, unix-время')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Запускает опрос всех учётных записей из ACCOUNTS_FILE.
+
+    С --shard несколько воркеров на одной машине делят учётные записи
+    через аренды в LEASE_DB, а команды бота обслуживает отдельный
+    процесс с --commands. Сервер метрик в режиме --commands
+    не запускается; воркер, которому не достался METRICS_PORT,
+    работает без него. --backfill загружает историю статусов
+    с --since и завершается.
+    """
+    args = parse_args(argv)
+    if not homework.TELEGRAM_TOKEN:
+        logger.critical('Отсутствует переменная окружения TELEGRAM_TOKEN')
+        sys.exit('Программа остановлена')
+    accounts = load_accounts(ACCOUNTS_FILE)
+    logger.info(f'Загружено учётных записей: {len(accounts)}')
+    bot = telegram.Bot(
+        token=homework.TELEGRAM_TOKEN,
+        request=Request(con_pool_size=delivery.SEND_WORKERS))
+    outbound = delivery.OutboundQueue(bot)
+    outbound.start()
+    outbound.register_metrics()
+    session = homework.create_session(pool_size=POLL_CONCURRENCY)
+    homework.set_request_executor(
+        hedging.RequestExecutor(workers=POLL_CONCURRENCY * 2))
+    store = storage.StateStore()
+    cache = response_cache.ResponseCache()
+    if args.backfill:
+        backfill.Backfill(
+            outbound, store, session=session,
+            breaker=circuit.CircuitBreaker()).run(accounts, args.since)
+        outbound.close()
+        return
+    coordinator = None
+    if args.shard:
+        coordinator = sharding.ShardCoordinator(sharding.LeaseTable())
+        atexit.register(coordinator.close)
+    else:
+        updater = commands.start_updater(
+            homework.TELEGRAM_TOKEN, commands.StatusCommands(
+                outbound, store, command_chats(accounts)))
+        if args.commands:
+            if updater is not None:
+                updater.idle()
+            return
+    metrics.start_server()
+    relay = outbox.OutboxRelay(
+        store, outbound, coordinator=coordinator,
+        accounts=[account.key for account in accounts])
+    relay.start()
+    atexit.register(relay.close, outbox.OUTBOX_COMMIT_INTERVAL * 4)
+    profiler = profiling.Profiler()
+    profiler.install_signal()
+    asyncio.run(Poller(
+        outbound, accounts, session=session, store=store, cache=cache,
+        breaker=circuit.CircuitBreaker(), coordinator=coordinator,
+        relay=relay, profiler=profiler).run())
+
+
+if __name__ == '__main__':
+    log_config.configure_logging()
+    main()
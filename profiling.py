@@ -0,0 +1,213 @@
+import contextlib
+import cProfile
+import io
+import itertools
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+
+import log_config
+
+PROFILE = os.getenv('PROFILE', '0') == '1'
+PROFILE_EVERY = int(os.getenv('PROFILE_EVERY', 10))
+PROFILE_MEMORY = os.getenv('PROFILE_MEMORY', '0') == '1'
+PROFILE_SLOW_ITERATION = float(os.getenv('PROFILE_SLOW_ITERATION', 0))
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', 20))
+PROFILE_FILE = 'profile.log'
+PROFILE_SIGNAL = getattr(signal, 'SIGUSR1', None)
+WATCHDOG_MIN_INTERVAL = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+def profile_path(log_file=None):
+    """Возвращает путь файла профиля рядом с файлом лога."""
+    log_file = log_file or os.getenv('LOG_FILE', log_config.LOG_FILE)
+    return os.path.join(os.path.dirname(log_file), PROFILE_FILE)
+
+
+def format_stats(profile, top=PROFILE_TOP):
+    """Возвращает top самых дорогих по cumtime функций профиля."""
+    output = io.StringIO()
+    pstats.Stats(profile, stream=output).sort_stats(
+        pstats.SortKey.CUMULATIVE).print_stats(top)
+    return output.getvalue()
+
+
+def format_memory(snapshot, previous, top=PROFILE_TOP):
+    """Возвращает top строк кода по приросту памяти между снимками."""
+    differences = snapshot.compare_to(previous, 'lineno')[:top]
+    return '\n'.join(str(difference) for difference in differences)
+
+
+class Profiler:
+    """Профилирует итерации цикла опроса по запросу.
+
+    Включается переменной PROFILE=1 или сигналом SIGUSR1 (повторный
+    сигнал выключает). Каждая every-я итерация профилируется cProfile,
+    а с memory=True ещё и сравнивается снимок tracemalloc с прошлым.
+    Итерация дольше slow секунд записывает стеки своего потока, пока
+    ещё выполняется. Всё пишется в файл с ротацией рядом с main.log.
+
+    Выключенный профайлер без slow сводится к проверке флага: iteration
+    отдаёт пустой контекстный менеджер.
+    """
+
+    def __init__(self, enabled=PROFILE, every=PROFILE_EVERY,
+                 memory=PROFILE_MEMORY, slow=PROFILE_SLOW_ITERATION,
+                 top=PROFILE_TOP, filename=None, clock=time.monotonic):
+        """Создаёт профайлер; с enabled=True он сразу включён."""
+        self.every = max(1, every)
+        self.memory = memory
+        self.slow = slow
+        self.top = top
+        self.filename = filename
+        self.clock = clock
+        self.enabled = False
+        self._iterations = itertools.count()
+        self._sampling = threading.Lock()
+        self._snapshot = None
+        self._running = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._watchdog = None
+        self._output = None
+        if enabled:
+            self.enable()
+
+    @property
+    def output(self):
+        """Логгер файла профиля, создаётся при первой записи."""
+        if self._output is None:
+            path = os.path.abspath(self.filename or profile_path())
+            output = logging.getLogger(f'{__name__}.output:{path}')
+            if not output.handlers:
+                handler = log_config.create_file_handler(path)
+                handler.setFormatter(logging.Formatter(
+                    '%(asctime)s | %(message)s'))
+                output.addHandler(handler)
+                output.setLevel(logging.INFO)
+                output.propagate = False
+            self._output = output
+        return self._output
+
+    def enable(self):
+        """Включает профилирование итераций."""
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+        logger.info('Профилирование включено')
+
+    def disable(self):
+        """Выключает профилирование итераций."""
+        self.enabled = False
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._snapshot = None
+        logger.info('Профилирование выключено')
+
+    def toggle(self, signum=None, frame=None):
+        """Переключает профилирование, годится как обработчик сигнала."""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def install_signal(self, signum=PROFILE_SIGNAL):
+        """Переключает профилирование по сигналу signum.
+
+        Работает только в главном потоке и там, где сигнал есть.
+        """
+        if signum is not None:
+            signal.signal(signum, self.toggle)
+
+    def iteration(self, name='main'):
+        """Контекстный менеджер вокруг одной итерации цикла."""
+        if not self.enabled and self.slow <= 0:
+            return contextlib.nullcontext()
+        return self._iteration(name)
+
+    @contextlib.contextmanager
+    def _iteration(self, name):
+        token = self._watch(name) if self.slow > 0 else None
+        profile = None
+        if (self.enabled and next(self._iterations) % self.every == 0
+                and self._sampling.acquire(blocking=False)):
+            profile = cProfile.Profile()
+        try:
+            if profile is None:
+                yield
+            else:
+                started = self.clock()
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+                    self._sampling.release()
+                    self._report(name, profile, self.clock() - started)
+        finally:
+            if token is not None:
+                with self._lock:
+                    self._running.pop(token, None)
+
+    def _report(self, name, profile, elapsed):
+        self.output.info(
+            f'Итерация {name} за {elapsed:.3f} с\n'
+            f'{format_stats(profile, self.top)}')
+        if not (self.memory and tracemalloc.is_tracing()):
+            return
+        snapshot = tracemalloc.take_snapshot()
+        if self._snapshot is not None:
+            self.output.info(
+                f'Прирост памяти после итерации {name}:\n'
+                f'{format_memory(snapshot, self._snapshot, self.top)}')
+        self._snapshot = snapshot
+
+    def _watch(self, name):
+        token = next(self._tokens)
+        with self._lock:
+            self._running[token] = (
+                threading.get_ident(), self.clock() + self.slow, name)
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(
+                    target=self._run_watchdog, name='profiling',
+                    daemon=True)
+                self._watchdog.start()
+        return token
+
+    def check_slow(self):
+        """Записывает стеки итераций, превысивших порог slow.
+
+        Стек каждой итерации записывается один раз.
+        """
+        now = self.clock()
+        with self._lock:
+            slow = [(token, entry) for token, entry in self._running.items()
+                    if entry[1] <= now]
+            for token, _ in slow:
+                self._running.pop(token)
+        frames = sys._current_frames()
+        for _, (thread_id, deadline, name) in slow:
+            frame = frames.get(thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame else ''
+            self.output.warning(
+                f'Итерация {name} идёт дольше {self.slow} с '
+                f'(+{now - deadline:.3f} с), стек:\n{stack}')
+        return len(slow)
+
+    def _run_watchdog(self):
+        interval = max(WATCHDOG_MIN_INTERVAL, self.slow / 4)
+        while True:
+            time.sleep(interval)
+            try:
+                self.check_slow()
+            except Exception:
+                logger.error('Сбой сторожа медленных итераций',
+                             exc_info=True)
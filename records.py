@@ -0,0 +1,68 @@
+import sys
+from collections import namedtuple
+from enum import Enum
+
+
+class HomeworkStatus(Enum):
+    """Статус проверки домашней работы."""
+
+    APPROVED = 'approved'
+    REVIEWING = 'reviewing'
+    REJECTED = 'rejected'
+
+
+def to_status(value, statuses=()):
+    """Возвращает статус работы по значению из ответа API.
+
+    Известные статусы - члены HomeworkStatus. Статус из statuses,
+    которого нет в перечислении (например, добавленный только
+    в файлы locales), возвращается интернированной строкой.
+    """
+    try:
+        return HomeworkStatus(value)
+    except ValueError:
+        if isinstance(value, str) and value in statuses:
+            return sys.intern(value)
+        raise ValueError(f'Такого {value} статуса нет')
+
+
+def status_value(status):
+    """Возвращает строковое значение статуса из to_status."""
+    if isinstance(status, HomeworkStatus):
+        return status.value
+    return status
+
+
+class Homework(namedtuple(
+        'Homework', ['id', 'name', 'status', 'date_updated'])):
+    """Проверенная запись о домашней работе из ответа API.
+
+    Создаётся один раз в check_homeworks; статус хранится как член
+    HomeworkStatus или интернированная строка (см. to_status), поэтому
+    одинаковые статусы не дублируются в памяти.
+    """
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Ключ работы: id, а при его отсутствии имя."""
+        return str(self.id or self.name)
+
+    @classmethod
+    def from_dict(cls, data, statuses=()):
+        """Проверяет словарь работы из ответа API и создаёт запись.
+
+        statuses - допустимые статусы сверх HomeworkStatus.
+        """
+        if not isinstance(data, dict):
+            raise TypeError('Работа в ответе API не является словарем')
+        homework_name = data.get('homework_name')
+        homework_status = data.get('status')
+        if homework_name is None or homework_status is None:
+            raise KeyError(
+                'В ответе отсутствует имя работы или статус '
+                f'статус: {homework_status}, имя работы: {homework_name}')
+        return cls(
+            data.get('id'), homework_name,
+            to_status(homework_status, statuses), data.get('date_updated'))
@@ -0,0 +1,109 @@
+import functools
+import json
+import logging
+import os
+import re
+from string import Template
+
+LOCALES_DIR = os.getenv('LOCALES_DIR', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'locales'))
+DEFAULT_LOCALE = os.getenv('DEFAULT_LOCALE', 'ru')
+RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', 4096))
+LOCALE_PATTERN = re.compile(r'^[a-z]{2,3}([_-][A-Za-z]{2,4})?$')
+DEFAULT_SUMMARY = Template(
+    'Загружена история работ: $homeworks, изменений статуса: $transitions.')
+
+logger = logging.getLogger(__name__)
+
+
+class Locale:
+    """Шаблоны сообщений и таблица вердиктов одного языка."""
+
+    __slots__ = ('name', 'template', 'verdicts', 'summary')
+
+    def __init__(self, name, template, verdicts, summary=None):
+        """Создаёт язык name с шаблонами string.Template и вердиктами."""
+        self.name = name
+        self.template = template
+        self.verdicts = verdicts
+        self.summary = summary
+
+
+@functools.lru_cache(maxsize=None)
+def load_locale(name):
+    """Загружает locales/<name>.json при первом обращении.
+
+    Шаблон компилируется один раз; повторные вызовы берут готовый
+    объект из кеша.
+    """
+    if not LOCALE_PATTERN.match(name):
+        raise ValueError(f'Недопустимое имя локали: {name}')
+    path = os.path.join(LOCALES_DIR, f'{name}.json')
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    verdicts = data.get('verdicts')
+    if 'template' not in data or not isinstance(verdicts, dict):
+        raise KeyError(f'В локали {name} нет шаблона или таблицы вердиктов')
+    summary = data.get('summary')
+    return Locale(name, Template(data['template']), verdicts,
+                  Template(summary) if summary else None)
+
+
+def get_locale(name=None):
+    """Возвращает локаль, а если её нет - локаль по умолчанию."""
+    if name and name != DEFAULT_LOCALE:
+        try:
+            return load_locale(name)
+        except (OSError, ValueError):
+            logger.warning(
+                f'Локаль {name} недоступна, используется {DEFAULT_LOCALE}')
+    return load_locale(DEFAULT_LOCALE)
+
+
+def statuses():
+    """Возвращает статусы, для которых есть вердикт по умолчанию."""
+    return load_locale(DEFAULT_LOCALE).verdicts.keys()
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render(homework_name, status, locale=None):
+    """Возвращает текст уведомления о смене статуса работы.
+
+    Результат запоминается по (homework_name, status, locale), так что
+    повторные уведомления и рассылка по многим чатам не форматируют
+    строку заново.
+    """
+    table = get_locale(locale)
+    return table.template.substitute(
+        name=homework_name, verdict=verdict(status, locale))
+
+
+def verdict(status, locale=None):
+    """Возвращает вердикт для статуса.
+
+    Если в локали нет вердикта для статуса, берётся вердикт из локали
+    по умолчанию.
+    """
+    text = get_locale(locale).verdicts.get(status)
+    if text is None:
+        text = load_locale(DEFAULT_LOCALE).verdicts.get(status)
+    if text is None:
+        raise ValueError(f'Такого {status} статуса нет')
+    return text
+
+
+def summary(homeworks, transitions, locale=None):
+    """Возвращает заголовок итога загрузки истории.
+
+    Если в локали нет шаблона summary, берётся шаблон локали
+    по умолчанию, а без него - DEFAULT_SUMMARY.
+    """
+    template = (get_locale(locale).summary
+                or load_locale(DEFAULT_LOCALE).summary or DEFAULT_SUMMARY)
+    return template.substitute(homeworks=homeworks, transitions=transitions)
+
+
+def clear_cache():
+    """Сбрасывает загруженные локали и готовые сообщения."""
+    load_locale.cache_clear()
+    render.cache_clear()
@@ -0,0 +1,111 @@
+import hashlib
+import re
+import threading
+from http import HTTPStatus
+
+import metrics
+
+CURRENT_DATE_PATTERN = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+CACHE_REQUESTS = metrics.Counter(
+    'homework_bot_response_cache_total',
+    'Ответы API: совпавшие с предыдущим (hit) и новые (miss)',
+    labels=['result'])
+
+
+def fingerprint(content):
+    """Возвращает отпечаток тела ответа без поля current_date.
+
+    current_date меняется в каждом ответе, поэтому оно исключается,
+    а его значение возвращается отдельно. Если поля нет - (None, None).
+    """
+    match = CURRENT_DATE_PATTERN.search(content)
+    if match is None:
+        return None, None
+    body = content[:match.start()] + content[match.end():]
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+    return digest, int(match.group(1))
+
+
+class CacheEntry:
+    """Отпечаток последнего ответа для одного токена."""
+
+    __slots__ = ('etag', 'last_modified', 'digest', 'current_date')
+
+    def __init__(self, etag, last_modified, digest, current_date):
+        """Запоминает валидаторы и отпечаток тела ответа."""
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.current_date = current_date
+
+
+class ResponseCache:
+    """Отпечатки последних ответов API по токенам.
+
+    Если API поддерживает ETag или Last-Modified, запрос становится
+    условным. Иначе сравнивается хеш тела ответа. Совпавший ответ
+    заменяется пустым списком работ без разбора JSON и проверок.
+    """
+
+    def __init__(self):
+        """Создаёт пустой кеш."""
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def conditional_headers(self, token):
+        """Возвращает заголовки условного запроса для токена."""
+        entry = self._entries.get(token)
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def lookup(self, token, response):
+        """Возвращает ответ без изменений или None, если ответ новый.
+
+        Отпечаток нового ответа запоминается.
+        """
+        entry = self._entries.get(token)
+        if response.status_code == HTTPStatus.NOT_MODIFIED and entry:
+            return self._hit(entry.current_date)
+        if response.status_code != HTTPStatus.OK:
+            return None
+        digest, current_date = fingerprint(response.content)
+        if digest is None:
+            self._miss()
+            return None
+        if entry is not None and entry.digest == digest:
+            entry.current_date = current_date
+            return self._hit(current_date)
+        self._entries[token] = CacheEntry(
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            digest, current_date)
+        self._miss()
+        return None
+
+    def forget(self, token):
+        """Удаляет отпечаток токена, например после ошибки разбора."""
+        self._entries.pop(token, None)
+
+    def skip_rate(self):
+        """Возвращает долю ответов, обработанных без разбора JSON."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _hit(self, current_date):
+        with self._lock:
+            self.hits += 1
+        CACHE_REQUESTS.inc('hit')
+        return {'homeworks': [], 'current_date': current_date}
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+        CACHE_REQUESTS.inc('miss')
@@ -0,0 +1,68 @@
+import os
+import random
+import time
+
+RETRY_TIME = 600
+ACTIVE_RETRY_TIME = int(os.getenv('ACTIVE_RETRY_TIME', 120))
+IDLE_RETRY_TIME = int(os.getenv('IDLE_RETRY_TIME', 1800))
+ERROR_RETRY_TIME = int(os.getenv('ERROR_RETRY_TIME', 60))
+MAX_ERROR_RETRY_TIME = int(os.getenv('MAX_ERROR_RETRY_TIME', 3600))
+RETRY_JITTER = 0.1
+
+ACTIVE_STATUS = 'reviewing'
+FINAL_STATUS = 'approved'
+
+
+class PollSchedule:
+    """Вычисляет время следующего опроса учётной записи.
+
+    Пока есть работы на проверке, опрос идёт чаще; если незавершённых
+    работ нет - реже. После ошибок интервал растёт экспоненциально.
+    Ко всем интервалам добавляется случайный разброс, чтобы опросы
+    разных учётных записей не совпадали.
+    """
+
+    def __init__(self, retry_time=RETRY_TIME, active_time=ACTIVE_RETRY_TIME,
+                 idle_time=IDLE_RETRY_TIME, error_time=ERROR_RETRY_TIME,
+                 max_error_time=MAX_ERROR_RETRY_TIME, jitter=RETRY_JITTER):
+        """Задаёт интервалы опроса в секундах и долю разброса jitter."""
+        self.retry_time = retry_time
+        self.active_time = active_time
+        self.idle_time = idle_time
+        self.error_time = error_time
+        self.max_error_time = max_error_time
+        self.jitter = jitter
+        self.failures = 0
+        self.next_run = time.monotonic()
+
+    def interval(self, states):
+        """Возвращает базовый интервал опроса по статусам работ."""
+        if states.count(ACTIVE_STATUS):
+            return self.active_time
+        if len(states) > states.count(FINAL_STATUS):
+            return self.retry_time
+        return self.idle_time
+
+    def success(self, states):
+        """Сбрасывает счётчик ошибок и возвращает задержку до опроса."""
+        self.failures = 0
+        interval = self.interval(states)
+        delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return self._schedule(delay)
+
+    def failure(self):
+        """Увеличивает счётчик ошибок и возвращает задержку до опроса."""
+        self.failures += 1
+        backoff = min(
+            self.max_error_time,
+            self.error_time * 2 ** (self.failures - 1))
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        return self._schedule(delay)
+
+    def postpone(self, delay):
+        """Откладывает опрос минимум на delay секунд, не считая ошибкой."""
+        return self._schedule(delay * random.uniform(1, 1 + self.jitter))
+
+    def _schedule(self, delay):
+        self.next_run = time.monotonic() + delay
+        return delay
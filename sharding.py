@@ -0,0 +1,227 @@
+import bisect
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import storage
+
+LEASE_DB = os.getenv('LEASE_DB', storage.STATE_DB)
+LEASE_TTL = float(os.getenv('LEASE_TTL', 30))
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', 256))
+RING_REPLICAS = 64
+WORKER_ID = os.getenv('WORKER_ID', f'{socket.gethostname()}-{os.getpid()}')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shard_leases (
+    shard INTEGER PRIMARY KEY,
+    worker TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def stable_hash(value):
+    """Возвращает хеш строки, одинаковый во всех процессах."""
+    digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def shard_of(key, shard_count=SHARD_COUNT):
+    """Возвращает номер шарда для ключа учётной записи.
+
+    Шард выбирается по отпечатку токена в начале ключа
+    storage.account_key, поэтому все подписки на токен попадают
+    в один шард.
+    """
+    return stable_hash(key.partition(':')[0]) % shard_count
+
+
+class HashRing:
+    """Кольцо консистентного хеширования.
+
+    Каждый узел занимает replicas точек на кольце; элемент принадлежит
+    первому узлу по часовой стрелке. При добавлении или удалении узла
+    переезжает примерно 1/N элементов.
+    """
+
+    def __init__(self, nodes, replicas=RING_REPLICAS):
+        """Раскладывает replicas точек каждого узла по кольцу."""
+        points = sorted(
+            (stable_hash(f'{node}#{replica}'), node)
+            for node in nodes for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def owner(self, item):
+        """Возвращает узел, которому принадлежит элемент."""
+        if not self._nodes:
+            return None
+        index = bisect.bisect(self._hashes, stable_hash(item))
+        return self._nodes[index % len(self._nodes)]
+
+
+class LeaseTable:
+    """Аренды воркеров и шардов в общей локальной базе SQLite.
+
+    Воркер продлевает свою запись в workers; шард можно занять,
+    только если его аренда свободна, истекла или уже принадлежит
+    этому воркеру, поэтому два воркера никогда не владеют шардом
+    одновременно.
+    """
+
+    def __init__(self, path=LEASE_DB, worker=WORKER_ID, ttl=LEASE_TTL,
+                 clock=time.time):
+        """Открывает базу аренд path от имени воркера worker."""
+        self.worker = worker
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=ttl / 3, check_same_thread=False,
+            isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(SCHEMA)
+
+    def heartbeat(self):
+        """Продлевает аренду воркера и возвращает живых воркеров."""
+        now = self.clock()
+        with self._lock, self._transaction():
+            self._connection.execute(
+                'INSERT OR REPLACE INTO workers (worker, expires_at) '
+                'VALUES (?, ?)', (self.worker, now + self.ttl))
+            self._connection.execute(
+                'DELETE FROM workers WHERE expires_at <= ?', (now,))
+            rows = self._connection.execute(
+                'SELECT worker FROM workers ORDER BY worker').fetchall()
+        return [worker for worker, in rows]
+
+    def acquire(self, shards):
+        """Занимает или продлевает шарды; возвращает занятые."""
+        now = self.clock()
+        with self._lock, self._transaction():
+            self._connection.executemany(
+                'INSERT INTO shard_leases (shard, worker, expires_at) '
+                'VALUES (?, ?, ?) ON CONFLICT (shard) DO UPDATE SET '
+                'worker = excluded.worker, expires_at = excluded.expires_at '
+                'WHERE shard_leases.worker = excluded.worker '
+                'OR shard_leases.expires_at <= ?',
+                [(shard, self.worker, now + self.ttl, now)
+                 for shard in shards])
+            rows = self._connection.execute(
+                'SELECT shard FROM shard_leases '
+                'WHERE worker = ? AND expires_at > ?',
+                (self.worker, now)).fetchall()
+        return {shard for shard, in rows}
+
+    def release(self, shards=None):
+        """Освобождает шарды (по умолчанию все) и запись воркера."""
+        with self._lock, self._transaction():
+            if shards is None:
+                self._connection.execute(
+                    'DELETE FROM shard_leases WHERE worker = ?',
+                    (self.worker,))
+                self._connection.execute(
+                    'DELETE FROM workers WHERE worker = ?', (self.worker,))
+                return
+            self._connection.executemany(
+                'DELETE FROM shard_leases WHERE shard = ? AND worker = ?',
+                [(shard, self.worker) for shard in shards])
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
+
+    def _transaction(self):
+        return Transaction(self._connection)
+
+
+class Transaction:
+    """BEGIN IMMEDIATE ... COMMIT для соединения без автотранзакций."""
+
+    def __init__(self, connection):
+        """Запоминает соединение, в котором открывается транзакция."""
+        self.connection = connection
+
+    def __enter__(self):
+        """Начинает транзакцию с блокировкой на запись."""
+        self.connection.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Фиксирует транзакцию или откатывает её при исключении."""
+        self.connection.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+class ShardCoordinator:
+    """Определяет, какие учётные записи опрашивает этот воркер.
+
+    Шарды распределяются между живыми воркерами кольцом HashRing,
+    а владение подтверждается арендой в LeaseTable. Шард с опросом
+    в процессе не отпускается до его завершения, а после истечения
+    аренды без продления воркер перестаёт считать шарды своими.
+    """
+
+    def __init__(self, leases, shard_count=SHARD_COUNT, clock=time.time):
+        """Создаёт координатор без шардов до первого refresh."""
+        self.leases = leases
+        self.shard_count = shard_count
+        self.clock = clock
+        self.owned = frozenset()
+        self.valid_until = 0.0
+        self._in_flight = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def refresh_interval(self):
+        """Как часто продлевать аренды, в секундах."""
+        return self.leases.ttl / 3
+
+    def refresh(self):
+        """Пересчитывает владение шардами и продлевает аренды."""
+        started = self.clock()
+        ring = HashRing(self.leases.heartbeat())
+        wanted = {shard for shard in range(self.shard_count)
+                  if ring.owner(shard) == self.leases.worker}
+        with self._lock:
+            busy = {shard for shard, count in self._in_flight.items()
+                    if count}
+            lost = set(self.owned) - wanted - busy
+            self.owned = frozenset(set(self.owned) - lost)
+        self.leases.release(lost)
+        owned = self.leases.acquire(wanted | (busy & self.owned))
+        with self._lock:
+            self.owned = frozenset(owned)
+            self.valid_until = started + self.leases.ttl
+        return self.owned
+
+    def acquire(self, key):
+        """Отмечает начало опроса учётной записи, если она своя.
+
+        Возвращает False, если шард принадлежит другому воркеру.
+        """
+        shard = shard_of(key, self.shard_count)
+        with self._lock:
+            if shard not in self.owned or self.clock() >= self.valid_until:
+                return False
+            self._in_flight[shard] += 1
+        return True
+
+    def release(self, key):
+        """Отмечает окончание опроса учётной записи."""
+        shard = shard_of(key, self.shard_count)
+        with self._lock:
+            self._in_flight[shard] -= 1
+
+    def close(self):
+        """Отдаёт все шарды другим воркерам."""
+        with self._lock:
+            self.owned = frozenset()
+        self.leases.release()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STATE_DB = os.getenv('STATE_DB', 'state.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    account TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    account TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (account, homework)
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    name TEXT NOT NULL,
+    old_status TEXT,
+    new_status TEXT NOT NULL,
+    changed_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_account ON history (account, id);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    UNIQUE (account, homework, status)
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt_at, id);
+"""
+
+
+def account_key(token, chat_id):
+    """Возвращает ключ учётной записи, не раскрывающий токен."""
+    digest = hashlib.sha256(str(token).encode()).hexdigest()[:16]
+    return f'{digest}:{chat_id}'
+
+
+class StateStore:
+    """Хранит последнюю метку времени и статусы работ в SQLite.
+
+    База работает в режиме WAL: каждая запись после опроса - одна
+    короткая транзакция, а чтение при старте не блокирует запись.
+    """
+
+    def __init__(self, path=STATE_DB):
+        """Открывает базу path и создаёт недостающие таблицы."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def load_checkpoint(self, account):
+        """Возвращает сохранённый current_date учётной записи или None."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT from_date FROM checkpoints WHERE account = ?',
+                (account,)).fetchone()
+        return row[0] if row else None
+
+    def load_statuses(self, account):
+        """Возвращает словарь {работа: статус} учётной записи."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT homework, status FROM statuses WHERE account = ?',
+                (account,)).fetchall()
+        return dict(rows)
+
+    def load_homeworks(self, account):
+        """Возвращает список (имя работы, статус) учётной записи.
+
+        Имя берётся из последнего перехода работы; для работ без
+        истории вместо имени возвращается ключ.
+        """
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COALESCE(('
+                '    SELECT name FROM history'
+                '    WHERE history.account = statuses.account'
+                '    AND history.homework = statuses.homework'
+                '    ORDER BY id DESC LIMIT 1'
+                '), homework), status FROM statuses WHERE account = ?'
+                ' ORDER BY homework',
+                (account,)).fetchall()
+
+    def load_history(self, account, limit=10):
+        """Возвращает последние переходы учётной записи, новые первыми.
+
+        Каждый переход - (имя работы, старый статус, новый статус,
+        время изменения).
+        """
+        with self._lock:
+            return self._connection.execute(
+                'SELECT name, old_status, new_status, changed_at '
+                'FROM history WHERE account = ? ORDER BY id DESC LIMIT ?',
+                (account, limit)).fetchall()
+
+    def save_poll(self, account, current_date, statuses=None,
+                  transitions=None, notifications=None):
+        """Сохраняет результат опроса одной транзакцией.
+
+        transitions - переходы tracker.Transition, они попадают
+        в историю для команды /history. notifications - уведомления
+        OutboxEntry для исходящего ящика: они записываются в той же
+        транзакции, что и новые статусы, поэтому сбой между записью
+        статуса и отправкой не теряет уведомление.
+        """
+        now = int(time.time())
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO checkpoints '
+                '(account, from_date, updated_at) VALUES (?, ?, ?)',
+                (account, current_date, now))
+            if statuses:
+                self._connection.executemany(
+                    'INSERT OR REPLACE INTO statuses '
+                    '(account, homework, status) VALUES (?, ?, ?)',
+                    [(account, homework, status)
+                     for homework, status in statuses.items()])
+            if transitions:
+                self._connection.executemany(
+                    'INSERT INTO history (account, homework, name, '
+                    'old_status, new_status, changed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(account, transition.key, transition.homework.name,
+                      transition.old_status, transition.new_status, now)
+                     for transition in transitions])
+            if notifications:
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO outbox (account, homework, '
+                    'status, chat_id, text, next_attempt_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(account, entry.homework, entry.status,
+                      str(entry.chat_id), entry.text, 0)
+                     for entry in notifications])
+
+    def load_outbox(self, now, limit, exclude=(), accounts=None):
+        """Возвращает до limit уведомлений, которые пора отправить.
+
+        Уведомления из exclude (уже отправляемые) пропускаются,
+        а с accounts берутся только уведомления этих учётных записей.
+        Результат - список (id, account, chat_id, status, text, attempts)
+        по порядку записи.
+        """
+        query = ('SELECT id, account, chat_id, status, text, attempts '
+                 'FROM outbox WHERE next_attempt_at <= ?')
+        params = [now]
+        if accounts is not None:
+            query += ' AND account IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps(list(accounts)))
+        params.append(limit + len(exclude))
+        with self._lock:
+            rows = self._connection.execute(
+                query + ' ORDER BY id LIMIT ?', params).fetchall()
+        return [row for row in rows if row[0] not in exclude][:limit]
+
+    def complete_outbox(self, done=(), retries=()):
+        """Отмечает итоги отправки одной транзакцией.
+
+        done - id отправленных или окончательно отброшенных
+        уведомлений, они удаляются; retries - пары (id, время
+        следующей попытки).
+        """
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'DELETE FROM outbox WHERE id = ?',
+                [(entry_id,) for entry_id in done])
+            self._connection.executemany(
+                'UPDATE outbox SET attempts = attempts + 1, '
+                'next_attempt_at = ? WHERE id = ?',
+                [(next_attempt_at, entry_id)
+                 for entry_id, next_attempt_at in retries])
+
+    def outbox_size(self):
+        """Возвращает число неотправленных уведомлений."""
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,87 @@
+import json
+
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HOMEWORK_PREFIX = 'homeworks.item'
+
+
+def loads(content):
+    """Разбирает JSON через orjson, если он установлен."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class HomeworkStream:
+    """Работы из ответа API, которые читаются из сети по одной.
+
+    При наличии ijson тело ответа не загружается в память целиком:
+    каждая работа собирается из событий парсера и сразу отдаётся
+    дальше. Без ijson ответ разбирается целиком через loads.
+    Ответ проверяется так же, как в check_response; current_date
+    доступен после того, как поток прочитан до конца.
+    """
+
+    def __init__(self, raw):
+        """Оборачивает сырой поток тела ответа raw."""
+        self.raw = raw
+        self.current_date = None
+
+    def __iter__(self):
+        """Возвращает итератор по записям Homework."""
+        if ijson is None:
+            return self._iter_loaded()
+        return self._iter_events()
+
+    def _iter_loaded(self):
+        response = loads(self.raw.read())
+        if not isinstance(response, dict):
+            raise TypeError('Ответ API не является словарем')
+        if 'homeworks' not in response or 'current_date' not in response:
+            raise KeyError('Ключ не найден')
+        homeworks = response['homeworks']
+        if not isinstance(homeworks, list):
+            raise TypeError('Значение ключа homeworks не является списком')
+        self.current_date = response['current_date']
+        yield from homeworks
+
+    def _iter_events(self):
+        events = ijson.parse(self.raw, use_float=True)
+        _, event, _ = next(events, ('', None, None))
+        if event != 'start_map':
+            raise TypeError('Ответ API не является словарем')
+        keys = set()
+        for prefix, event, value in events:
+            if prefix == HOMEWORK_PREFIX:
+                if event != 'start_map':
+                    raise TypeError('Работа в ответе API не является словарем')
+                yield self._build_homework(events)
+            elif prefix == '' and event == 'map_key':
+                keys.add(value)
+            elif prefix == 'homeworks' and event not in (
+                    'start_array', 'end_array'):
+                raise TypeError('Значение ключа homeworks не является списком')
+            elif prefix == 'current_date' and event == 'number':
+                self.current_date = int(value)
+        if 'homeworks' not in keys or 'current_date' not in keys:
+            raise KeyError('Ключ не найден')
+
+    @staticmethod
+    def _build_homework(events):
+        """Собирает одну работу из событий парсера до конца её словаря."""
+        builder = ObjectBuilder()
+        builder.event('start_map', None)
+        for prefix, event, value in events:
+            builder.event(event, value)
+            if prefix == HOMEWORK_PREFIX and event == 'end_map':
+                return builder.value
+        raise ValueError('Ответ API оборвался на середине работы')
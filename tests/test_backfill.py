@@ -0,0 +1,86 @@
+from utils import MockBot
+
+
+class TestBackfill:
+
+    def test_summary_is_localized(self):
+        import backfill
+        import records
+
+        homeworks = [records.Homework.from_dict({
+            'id': 1, 'homework_name': 'hw', 'status': 'approved'})]
+        message = backfill.summary_message(homeworks, [], 'en')
+        assert message.startswith(
+            'History loaded: 1 homeworks, 0 status changes.'), (
+            'Проверьте, что заголовок итога берётся из локали'
+        )
+
+    def test_backfill_from_zero_requests_full_history(
+            self, monkeypatch, tmp_path, random_timestamp):
+        from http import HTTPStatus
+        from types import SimpleNamespace
+
+        import backfill
+        import homework
+        import poller
+        import storage
+
+        params = []
+
+        def mock_send(headers, request_params, *args, **kwargs):
+            params.append(request_params)
+            return SimpleNamespace(
+                status_code=HTTPStatus.OK,
+                json=lambda: {'homeworks': [],
+                              'current_date': random_timestamp})
+
+        monkeypatch.setattr(homework, 'send_api_request', mock_send)
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        backfill.Backfill(MockBot(), store, rate=1000).run(
+            [poller.Account('token', 1)])
+        assert params == [{'from_date': 0}], (
+            'Проверьте, что загрузка истории с since=0 запрашивает '
+            'всю историю, а не изменения с текущего момента'
+        )
+
+    def test_backfill_saves_history_and_sends_summary(
+            self, monkeypatch, tmp_path, random_timestamp):
+        import backfill
+        import homework
+        import poller
+        import storage
+
+        requested = []
+
+        def mock_request(token, current_timestamp, **kwargs):
+            requested.append((token, current_timestamp))
+            homeworks = [{
+                'id': token, 'homework_name': f'hw-{token}',
+                'status': 'approved', 'date_updated': '2022-01-01T00:00:00Z',
+            }, {
+                'id': 'shared', 'homework_name': 'shared',
+                'status': 'rejected', 'date_updated': '2022-01-01T00:00:00Z',
+            }]
+            return {'homeworks': homeworks,
+                    'current_date': random_timestamp}
+
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses', mock_request)
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        bot = MockBot()
+        accounts = [poller.Account(f'token-{i}', i) for i in range(3)]
+        results = backfill.Backfill(
+            bot, store, concurrency=4, rate=1000).run(accounts, since=100)
+
+        assert sorted(requested) == [
+            (f'token-{i}', 100) for i in range(3)], (
+            'Проверьте, что история запрашивается одним запросом '
+            'на учётную запись'
+        )
+        assert sorted(results.values()) == [2, 2, 2]
+        assert len(bot.messages) == 3, (
+            'Проверьте, что на учётную запись отправляется одно сообщение'
+        )
+        assert 'Загружена история работ: 2' in bot.messages[0][1]
+        assert len(store.load_statuses(accounts[0].key)) == 2
+        assert store.load_checkpoint(accounts[0].key) == random_timestamp
@@ -0,0 +1,15 @@
+class TestBenchmark:
+
+    def test_smoke_run(self):
+        from benchmarks import run
+
+        result = run.run_benchmark(
+            3, duration=1.5, poll_interval=0.2, change_rate=0.5,
+            global_rate=1000, chat_rate=100, seed=1)
+        assert result['polls'] > 3, (
+            'Проверьте, что нагрузочный тест опрашивает фейковый Практикум'
+        )
+        assert result['messages'] > 0, (
+            'Проверьте, что уведомления доходят до фейкового Telegram'
+        )
+        assert result['p99_latency'] >= result['p50_latency'] >= 0
@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+from utils import MockBot, MockClock
+
+
+class MockResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_consecutive_failures(self):
+        import circuit
+
+        breaker = circuit.CircuitBreaker(
+            failures=3, reset_time=10, clock=MockClock())
+        assert [breaker.failure() for _ in range(3)] == [False, False, True]
+        assert breaker.state == circuit.OPEN
+        assert not breaker.allow(), (
+            'Проверьте, что разомкнутый предохранитель пропускает опросы'
+        )
+        assert breaker.outages == 1
+
+    def test_opens_on_error_ratio(self):
+        import circuit
+
+        breaker = circuit.CircuitBreaker(
+            failures=100, error_ratio=0.5, window=4, clock=MockClock())
+        breaker.success()
+        breaker.failure()
+        breaker.success()
+        assert breaker.failure(), (
+            'Проверьте, что предохранитель размыкается по доле сбоев'
+        )
+
+    def test_half_open_probes(self):
+        import circuit
+
+        clock = MockClock()
+        breaker = circuit.CircuitBreaker(
+            failures=1, reset_time=10, probes=1, clock=clock)
+        breaker.failure()
+        clock.now = 10
+        assert breaker.allow(), 'Проверьте, что проба пропускается'
+        assert not breaker.allow(), (
+            'Проверьте, что число пробных запросов ограничено'
+        )
+        assert not breaker.failure()
+        assert breaker.state == circuit.OPEN
+        assert breaker.outages == 1, (
+            'Неудачная проба не должна начинать новый сбой'
+        )
+        clock.now = 20
+        assert breaker.allow()
+        breaker.success()
+        assert breaker.state == circuit.CLOSED
+        assert breaker.allow()
+
+
+class TestPollerWithBreaker:
+
+    def test_outage_reported_once(self, monkeypatch):
+        import circuit
+        import homework
+        import poller
+
+        requests_sent = []
+
+        def mock_send(*args, **kwargs):
+            requests_sent.append(args)
+            return MockResponse(HTTPStatus.SERVICE_UNAVAILABLE)
+
+        monkeypatch.setattr(homework, 'send_unguarded_request', mock_send)
+        monkeypatch.setattr(poller, 'ALERT_CHAT_ID', 'alerts')
+        breaker = circuit.CircuitBreaker(
+            failures=3, reset_time=60, clock=MockClock())
+        bot = MockBot()
+        accounts = [poller.Account(f'token-{i}', i) for i in range(10)]
+        for _ in range(2):
+            for account in accounts:
+                poller.poll_account(bot, account, breaker=breaker)
+
+        assert len(requests_sent) == 3, (
+            'Проверьте, что после размыкания запросы к API не отправляются'
+        )
+        assert len(bot.messages) == 1, (
+            'Проверьте, что о сбое API сообщается один раз'
+        )
+        assert bot.messages[0][0] == 'alerts', (
+            'Проверьте, что о сбое API сообщается в ALERT_CHAT_ID'
+        )
+
+    def test_outage_without_alert_chat_is_logged(self, monkeypatch):
+        import circuit
+        import exceptions
+        import poller
+
+        monkeypatch.setattr(poller, 'ALERT_CHAT_ID', None)
+        bot = MockBot()
+        account = poller.Account('token', 42)
+        poller.handle_upstream_error(
+            bot, account, exceptions.OutageException('503'),
+            circuit.CircuitBreaker(clock=MockClock()))
+        assert bot.messages == [], (
+            'Проверьте, что без ALERT_CHAT_ID о сбое API не пишут '
+            'в чат студента'
+        )
+
+    def test_failed_outage_message_keeps_delay(self):
+        import circuit
+        import exceptions
+        import homework
+        import scheduler
+
+        class FullQueue:
+
+            def send_message(self, chat_id, text, **kwargs):
+                raise exceptions.TelegramMessageException('full')
+
+        delay = homework.handle_upstream_error(
+            FullQueue(), exceptions.OutageException('503'),
+            scheduler.PollSchedule(),
+            circuit.CircuitBreaker(clock=MockClock()))
+        assert delay > 0, (
+            'Проверьте, что сбой отправки сообщения не теряет задержку '
+            'до следующего опроса'
+        )
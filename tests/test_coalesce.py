@@ -0,0 +1,63 @@
+from utils import MockBot
+
+
+class TestGroupByToken:
+
+    def test_groups_keep_first_appearance_order(self):
+        import coalesce
+        import poller
+
+        accounts = [poller.Account(token, chat) for token, chat in (
+            ('first', 1), ('second', 2), ('first', 3))]
+        groups = coalesce.group_by_token(accounts)
+        assert [[account.chat_id for account in group]
+                for group in groups] == [[1, 3], [2]], (
+            'Проверьте, что подписки группируются по токену'
+        )
+
+
+class TestPollerCoalescing:
+
+    def test_subscriptions_share_token_request(self, monkeypatch,
+                                               random_timestamp):
+        import homework
+        import poller
+
+        requested = []
+
+        def mock_request(token, current_timestamp, **kwargs):
+            requested.append((token, current_timestamp))
+            return {
+                'homeworks': [{'id': 1, 'homework_name': 'hw123',
+                               'status': 'approved'}],
+                'current_date': random_timestamp,
+            }
+
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses', mock_request)
+        bot = MockBot()
+        accounts = [poller.Account('shared-token', chat) for chat in (1, 2)]
+        accounts[0].current_timestamp = random_timestamp - 60
+        accounts[1].current_timestamp = random_timestamp - 30
+        poller.poll_token(bot, accounts)
+
+        assert requested == [('shared-token', random_timestamp - 60)], (
+            'Проверьте, что подписки на один токен делят запрос к API '
+            'с самой ранней метки времени'
+        )
+        assert sorted(chat for chat, _ in bot.messages) == [1, 2], (
+            'Проверьте, что результат рассылается всем подпискам'
+        )
+        assert all(account.current_timestamp == random_timestamp
+                   for account in accounts)
+
+    def test_one_timer_per_token(self):
+        import poller
+
+        accounts = [poller.Account('shared-token', chat) for chat in (1, 2)]
+        instance = poller.Poller(
+            MockBot(), accounts + [poller.Account('own-token', 3)])
+        instance.start_wheel()
+        assert len(instance.wheel) == 2, (
+            'Проверьте, что в колесе один таймер на каждый токен'
+        )
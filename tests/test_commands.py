@@ -0,0 +1,76 @@
+from utils import MockBot
+
+
+class MockUpdate:
+
+    class Chat:
+
+        def __init__(self, chat_id):
+            self.id = chat_id
+
+    def __init__(self, chat_id):
+        self.effective_chat = self.Chat(chat_id)
+
+
+class TestStatusCommands:
+
+    def test_answers_from_store_without_api(self, monkeypatch, tmp_path,
+                                            random_timestamp):
+        import commands
+        import homework
+        import poller
+        import storage
+
+        responses = [
+            {'homeworks': [{'id': 1, 'homework_name': 'hw123',
+                            'status': 'reviewing'}],
+             'current_date': random_timestamp},
+            {'homeworks': [{'id': 1, 'homework_name': 'hw123',
+                            'status': 'approved'}],
+             'current_date': random_timestamp + 1},
+        ]
+        requested = []
+
+        def mock_request(token, current_timestamp, **kwargs):
+            requested.append(current_timestamp)
+            return responses.pop(0)
+
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses', mock_request)
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        account = poller.Account('token', 42)
+        poll_bot = MockBot()
+        poller.poll_account(poll_bot, account, store=store)
+        poller.poll_account(poll_bot, account, store=store)
+
+        bot = MockBot()
+        status_commands = commands.StatusCommands(
+            bot, store, poller.command_chats([account]))
+        status_commands.status(MockUpdate(42), None)
+        status_commands.history(MockUpdate(42), None)
+        status_commands.status(MockUpdate(43), None)
+
+        assert len(requested) == 2, (
+            'Проверьте, что команды не обращаются к API Практикума'
+        )
+        assert bot.messages[0] == (
+            42, 'hw123: Работа проверена: ревьюеру всё понравилось. Ура!')
+        history = bot.messages[1][1].splitlines()
+        assert len(history) == 2
+        assert history[0].endswith('hw123: Работа проверена: '
+                                   'ревьюеру всё понравилось. Ура!')
+        assert history[1].endswith('hw123: Работа взята на проверку '
+                                   'ревьюером.')
+        assert len(bot.messages) == 2, (
+            'Проверьте, что бот не отвечает неизвестным чатам'
+        )
+
+    def test_empty_state(self, tmp_path):
+        import commands
+        import storage
+
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        status_commands = commands.StatusCommands(
+            MockBot(), store, {42: [commands.ChatAccount('key')]})
+        assert status_commands.status_text(42) == 'Статусов работ пока нет.'
+        assert status_commands.history_text('42') == 'История пока пуста.'
@@ -0,0 +1,201 @@
+import threading
+import time
+
+import telegram
+
+from utils import MockBot, MockClock
+
+
+class TestTokenBucket:
+
+    def test_reserve(self):
+        import delivery
+
+        clock = MockClock()
+        bucket = delivery.TokenBucket(rate=2, capacity=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5, (
+            'Проверьте, что при исчерпании запаса `reserve` возвращает '
+            'время ожидания'
+        )
+        clock.now = 1.5
+        assert bucket.reserve() == 0
+
+
+class TestOutboundQueue:
+
+    def test_chat_order_and_rate(self):
+        import delivery
+
+        bot = MockBot()
+        outbound = delivery.OutboundQueue(bot, global_rate=1000, chat_rate=20)
+        outbound.start()
+        for i in range(3):
+            outbound.send_message(1, f'message-{i}')
+        outbound.send_message(2, 'other')
+        outbound.close(timeout=5)
+
+        chat_messages = [(m[1], sent_at) for m, sent_at in zip(
+            bot.messages, bot.sent_at) if m[0] == 1]
+        assert [m[0] for m in chat_messages] == [
+            'message-0', 'message-1', 'message-2'
+        ], 'Проверьте, что сообщения одного чата отправляются по порядку'
+        gaps = [b[1] - a[1] for a, b in zip(chat_messages, chat_messages[1:])]
+        assert all(gap >= 0.045 for gap in gaps), (
+            'Проверьте, что в один чат сообщения уходят не чаще `chat_rate`'
+        )
+        assert len(bot.messages) == 4
+
+    def test_retry_after_is_retried(self, monkeypatch):
+        import delivery
+
+        bot = MockBot(errors=[
+            telegram.error.RetryAfter(0.05),
+            telegram.error.TimedOut(),
+        ])
+        outbound = delivery.OutboundQueue(bot, global_rate=1000, chat_rate=100)
+        monkeypatch.setattr(delivery, 'SEND_RETRY_TIME', 0.01)
+        outbound.start()
+        outbound.send_message(1, 'message')
+        outbound.close(timeout=5)
+        assert [m[1] for m in bot.messages] == ['message'], (
+            'Проверьте, что после RetryAfter и сетевой ошибки сообщение '
+            'отправляется повторно, а не теряется'
+        )
+
+    def test_unexpected_error_keeps_worker(self, monkeypatch):
+        import delivery
+
+        bot = MockBot(errors=[ValueError('unexpected')])
+        outbound = delivery.OutboundQueue(
+            bot, global_rate=1000, chat_rate=100, workers=1)
+        monkeypatch.setattr(delivery, 'SEND_RETRY_TIME', 0.01)
+        outbound.start()
+        results = []
+
+        def failing_callback(result):
+            results.append(result)
+            raise RuntimeError('callback')
+
+        outbound.put(1, 'first', callback=failing_callback)
+        outbound.send_message(1, 'second')
+        outbound.close(timeout=5)
+        assert [m[1] for m in bot.messages] == ['first', 'second'], (
+            'Проверьте, что неожиданная ошибка отправки или обработчика '
+            'итога не останавливает поток отправки'
+        )
+        assert results == [delivery.SENT]
+
+    def test_permanent_error_is_dropped(self):
+        import delivery
+
+        bot = MockBot(errors=[telegram.error.BadRequest('Chat not found')])
+        outbound = delivery.OutboundQueue(bot, global_rate=1000, chat_rate=100)
+        outbound.start()
+        outbound.send_message(1, 'lost')
+        outbound.send_message(1, 'delivered')
+        outbound.close(timeout=5)
+        assert [m[1] for m in bot.messages] == ['delivered']
+
+    def test_backpressure_and_stats(self):
+        import delivery
+        import exceptions
+
+        release = threading.Event()
+
+        class SlowBot(MockBot):
+            def send_message(self, chat_id=None, text=None, **kwargs):
+                release.wait(5)
+                super().send_message(chat_id, text)
+
+        bot = SlowBot()
+        outbound = delivery.OutboundQueue(
+            bot, global_rate=1000, chat_rate=1000, workers=2, maxsize=3,
+            put_timeout=0.01)
+        outbound.start()
+        for chat_id in range(3):
+            outbound.send_message(chat_id, 'message')
+        try:
+            outbound.send_message(4, 'overflow')
+        except exceptions.TelegramMessageException:
+            pass
+        else:
+            assert False, (
+                'Проверьте, что при переполнении очереди `put` выбрасывает '
+                '`TelegramMessageException`'
+            )
+        assert outbound.stats()['depth'] == 3
+        release.set()
+        outbound.close(timeout=5)
+        stats = outbound.stats()
+        assert stats['depth'] == 0 and stats['in_flight'] == 0
+        assert stats['delivered'] == 3, (
+            'Проверьте, что `stats` учитывает доставленные сообщения'
+        )
+        assert stats['average_lag'] > 0
+
+    def test_close_without_drain(self):
+        import delivery
+
+        bot = MockBot()
+        outbound = delivery.OutboundQueue(bot, global_rate=1000, chat_rate=1)
+        for number in range(3):
+            outbound.send_message(1, f'message-{number}')
+        outbound.close(drain=False)
+        stats = outbound.stats()
+        assert stats['depth'] == 0 and stats['dropped'] == 3, (
+            'Проверьте, что `close(drain=False)` отбрасывает очередь'
+        )
+
+
+class TestDigest:
+
+    def test_messages_are_merged_per_chat(self):
+        import delivery
+
+        bot = MockBot()
+        results = []
+        outbound = delivery.OutboundQueue(
+            bot, global_rate=1000, chat_rate=1000, digest_window=0.3)
+        outbound.start()
+        started = time.monotonic()
+        for number in range(3):
+            outbound.put(1, f'change-{number}', callback=results.append)
+        outbound.put(2, 'approved', urgent=True)
+        time.sleep(0.1)
+        assert [m[1] for m in bot.messages] == ['approved'], (
+            'Проверьте, что срочное сообщение не ждёт окна дайджеста'
+        )
+        deadline = time.monotonic() + 5
+        while len(bot.messages) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        outbound.close(timeout=5)
+
+        assert [m[1] for m in bot.messages if m[0] == 1] == [
+            'change-0\n\nchange-1\n\nchange-2'
+        ], 'Проверьте, что сообщения чата за окно уходят одним дайджестом'
+        assert bot.sent_at[-1] - started >= 0.25
+        assert results == [delivery.SENT] * 3, (
+            'Проверьте, что итог дайджеста получает каждое сообщение'
+        )
+        stats = outbound.stats()
+        assert stats['delivered'] == 4 and stats['digests'] == 1
+
+    def test_digest_size_cap(self):
+        import delivery
+
+        bot = MockBot()
+        outbound = delivery.OutboundQueue(
+            bot, global_rate=1000, chat_rate=1000, digest_window=60,
+            digest_max_length=25)
+        outbound.start()
+        for letter in 'abc':
+            outbound.send_message(1, letter * 10)
+        outbound.close(timeout=5)
+        assert [m[1] for m in bot.messages] == [
+            'a' * 10 + '\n\n' + 'b' * 10, 'c' * 10
+        ], (
+            'Проверьте, что дайджест не длиннее `digest_max_length` '
+            'и переполненный дайджест отправляется без ожидания окна'
+        )
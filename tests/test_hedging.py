@@ -0,0 +1,120 @@
+import threading
+import time
+
+
+class MockResponse:
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class MockSend:
+    """Первая попытка ждёт release, остальные отвечают сразу."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+        self.responses = []
+        self.lock = threading.Lock()
+
+    def __call__(self, headers, params, session, timeout, stream):
+        with self.lock:
+            number = len(self.calls)
+            self.calls.append(timeout)
+        if number == 0:
+            self.release.wait(5)
+        response = MockResponse(f'attempt-{number}')
+        self.responses.append(response)
+        return response
+
+
+def make_executor(**kwargs):
+    import hedging
+
+    latencies = hedging.LatencyTracker(min_samples=3)
+    for _ in range(3):
+        latencies.observe(0.01)
+    return hedging.RequestExecutor(
+        latencies=latencies, min_delay=0.05, **kwargs)
+
+
+class TestRequestExecutor:
+
+    def test_deadline_bounds_request(self):
+        send = MockSend()
+        executor = make_executor(deadline=0.1, hedge=False)
+        started = time.monotonic()
+        try:
+            executor.execute(send, {}, {}, None, (3, 30))
+        except ConnectionError:
+            pass
+        else:
+            assert False, (
+                'Проверьте, что запрос дольше срока опроса выбрасывает '
+                '`ConnectionError`'
+            )
+        assert time.monotonic() - started < 1
+        assert send.calls[0][1] <= 0.1, (
+            'Проверьте, что тайм-аут чтения урезается до срока опроса'
+        )
+        send.release.set()
+        executor.close()
+
+    def test_hedge_wins_and_loser_is_closed(self):
+        import hedging
+
+        send = MockSend()
+        executor = make_executor(deadline=5, hedge=True)
+        assert executor.hedge_delay() == 0.05
+        response = executor.execute(send, {}, {}, None, (3, 30))
+        assert response.name == 'attempt-1', (
+            'Проверьте, что медленный запрос страхуется вторым '
+            'и побеждает первый ответ'
+        )
+        stats = executor.stats()
+        assert stats['hedged'] == 1 and stats['win_rate'] == 1
+        assert hedging.HEDGED_REQUESTS._values[(hedging.HEDGE,)] >= 1
+        send.release.set()
+        deadline = time.monotonic() + 5
+        while len(send.responses) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        executor.close()
+        loser = [r for r in send.responses if r.name == 'attempt-0'][0]
+        assert loser.closed, (
+            'Проверьте, что ответ проигравшей попытки закрывается'
+        )
+
+    def test_no_hedge_without_history(self):
+        import hedging
+
+        executor = hedging.RequestExecutor(hedge=True, workers=1)
+        assert executor.hedge_delay() is None, (
+            'Проверьте, что без статистики задержек запрос не страхуется'
+        )
+        executor.close()
+
+    def test_api_requests_use_executor(self, monkeypatch):
+        import homework
+
+        calls = []
+
+        class MockExecutor:
+
+            def execute(self, send, headers, params, session, timeout,
+                        stream=False):
+                calls.append(timeout)
+                return send(headers, params, session, timeout, stream)
+
+        def mock_send(headers, params, session=None, timeout=None,
+                      stream=False):
+            return MockResponse('direct')
+
+        monkeypatch.setattr(homework, 'send_unguarded_request', mock_send)
+        monkeypatch.setattr(homework, 'request_executor', MockExecutor())
+        assert homework.send_api_request({}, {}).name == 'direct'
+        assert calls == [
+            (homework.API_CONNECT_TIMEOUT, homework.API_READ_TIMEOUT)]
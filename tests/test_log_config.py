@@ -0,0 +1,54 @@
+import gzip
+import logging
+import logging.handlers
+
+
+class TestLogConfig:
+
+    def test_queue_logging(self, monkeypatch, tmp_path):
+        import log_config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        monkeypatch.setenv('LOG_LEVEL', 'warning')
+        log_file = tmp_path / 'main.log'
+        try:
+            listener = log_config.configure_logging(filename=str(log_file))
+            assert root.level == logging.WARNING, (
+                'Проверьте, что уровень логирования берётся из LOG_LEVEL'
+            )
+            assert all(
+                isinstance(handler, logging.handlers.QueueHandler)
+                for handler in root.handlers
+            ), 'Проверьте, что записи лога передаются через очередь'
+            logging.getLogger('homework').warning('Проверка')
+            logging.getLogger('homework').info('Не попадёт в лог')
+            listener.stop()
+        finally:
+            root.handlers, root.level = saved_handlers, saved_level
+        content = log_file.read_text(encoding='utf-8')
+        assert 'Проверка' in content
+        assert 'Не попадёт в лог' not in content
+
+    def test_rotation_compresses(self, monkeypatch, tmp_path):
+        import log_config
+
+        monkeypatch.setenv('LOG_MAX_BYTES', '100')
+        log_file = tmp_path / 'main.log'
+        handler = log_config.create_file_handler(str(log_file))
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.getLogger('test_rotation')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            for number in range(10):
+                logger.error('x' * 30 + str(number))
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+        archive = tmp_path / 'main.log.1.gz'
+        assert archive.exists(), (
+            'Проверьте, что при ротации архив лога сжимается в .gz'
+        )
+        with gzip.open(archive, 'rt') as file:
+            assert 'x' * 30 in file.read()
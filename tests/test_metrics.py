@@ -0,0 +1,85 @@
+import urllib.request
+
+import pytest
+
+
+class TestMetrics:
+
+    def test_render_prometheus_text(self):
+        import metrics
+
+        registry = metrics.Registry()
+        counter = metrics.Counter(
+            'test_errors_total', 'Ошибки', labels=['stage', 'error'],
+            registry=registry)
+        histogram = metrics.Histogram(
+            'test_duration_seconds', 'Длительность', labels=['stage'],
+            buckets=(0.1, 1), registry=registry)
+        metrics.Gauge('test_depth', 'Глубина', lambda: 3, registry=registry)
+        counter.inc('get_api_answer', 'ConnectionError')
+        histogram.observe(0.05, 'parse_status')
+        histogram.observe(0.5, 'parse_status')
+        text = registry.render()
+        assert '# TYPE test_errors_total counter' in text
+        assert (
+            'test_errors_total{stage="get_api_answer",'
+            'error="ConnectionError"} 1'
+        ) in text
+        assert 'test_duration_seconds_bucket{stage="parse_status",le="0.1"} 1' \
+            in text
+        assert 'test_duration_seconds_bucket{stage="parse_status",le="+Inf"} 2' \
+            in text
+        assert 'test_duration_seconds_count{stage="parse_status"} 2' in text
+        assert 'test_depth 3' in text
+
+    def test_timed_counts_errors(self):
+        import metrics
+
+        @metrics.timed('test_stage')
+        def failing():
+            raise KeyError('homework_name')
+
+        before = metrics.STAGE_DURATION.count('test_stage')
+        with pytest.raises(KeyError):
+            failing()
+        assert metrics.ERRORS.value('test_stage', 'KeyError') >= 1, (
+            'Проверьте, что ошибки этапа учитываются по типу исключения'
+        )
+        assert metrics.STAGE_DURATION.count('test_stage') == before + 1
+
+    def test_stage_functions_are_instrumented(self):
+        import homework
+        import metrics
+
+        before = metrics.STAGE_DURATION.count('parse_status')
+        homework.parse_status({'homework_name': 'hw', 'status': 'approved'})
+        assert metrics.STAGE_DURATION.count('parse_status') == before + 1
+
+    def test_metrics_endpoint(self):
+        import metrics
+
+        server = metrics.start_server(port=0)
+        assert server is None, (
+            'Проверьте, что без METRICS_PORT сервер метрик не запускается'
+        )
+        server = metrics.start_server(port=18999)
+        try:
+            url = 'http://127.0.0.1:18999/metrics'
+            with urllib.request.urlopen(url, timeout=5) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'homework_bot_stage_duration_seconds' in body
+
+    def test_busy_metrics_port_is_not_fatal(self):
+        import metrics
+
+        server = metrics.start_server(port=18998)
+        try:
+            assert metrics.start_server(port=18998) is None, (
+                'Проверьте, что занятый порт метрик не останавливает бота'
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,187 @@
+from utils import MockBot, MockClock
+
+
+class MockQueue:
+    """Очередь, которая сразу сообщает заданный итог отправки."""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.messages = []
+
+    def put(self, chat_id, text, timeout=None, callback=None,
+            urgent=False):
+        self.messages.append((chat_id, text))
+        callback(self.results.pop(0))
+
+
+class MockCoordinator:
+    """Координатор с заданным набором своих шардов."""
+
+    def __init__(self, owned, shard_count=64):
+        self.owned = frozenset(owned)
+        self.shard_count = shard_count
+
+    def acquire(self, key):
+        import sharding
+
+        return sharding.shard_of(key, self.shard_count) in self.owned
+
+    def release(self, key):
+        pass
+
+
+def make_entry(status='approved', text='hw123 принята'):
+    import outbox
+
+    return outbox.OutboxEntry(42, 'hw123', status, text)
+
+
+class TestOutbox:
+
+    def test_entries_are_idempotent(self, tmp_path):
+        import storage
+
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        store.save_poll('account', 1, notifications=[make_entry()])
+        store.save_poll('account', 2, notifications=[make_entry()])
+        assert store.outbox_size() == 1, (
+            'Проверьте, что уведомление с тем же ключом '
+            'не добавляется повторно'
+        )
+
+    def test_failed_delivery_is_retried(self, tmp_path):
+        import delivery
+        import outbox
+        import storage
+
+        clock = MockClock(1000.0)
+        path = str(tmp_path / 'state.sqlite3')
+        store = storage.StateStore(path)
+        store.save_poll('account', 1, notifications=[make_entry()])
+        queue = MockQueue([delivery.FAILED, delivery.SENT])
+        relay = outbox.OutboxRelay(store, queue, clock=clock)
+
+        assert relay.relay() == 1
+        assert relay.relay() == 0, (
+            'Проверьте, что запись не ставится в очередь до следующей '
+            'попытки'
+        )
+        store.close()
+
+        store = storage.StateStore(path)
+        assert store.outbox_size() == 1, (
+            'Проверьте, что неотправленное уведомление переживает перезапуск'
+        )
+        relay = outbox.OutboxRelay(store, queue, clock=clock)
+        clock.now += outbox.OUTBOX_RETRY_TIME
+        assert relay.relay() == 1
+        relay.flush()
+        assert store.outbox_size() == 0
+        assert queue.messages == [('42', 'hw123 принята')] * 2
+
+    def test_rejected_entry_is_dropped(self, tmp_path):
+        import delivery
+        import outbox
+        import storage
+
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        store.save_poll('account', 1, notifications=[make_entry()])
+        relay = outbox.OutboxRelay(store, MockQueue([delivery.REJECTED]))
+        relay.relay()
+        relay.flush()
+        assert store.outbox_size() == 0
+
+    def test_relays_share_database_without_duplicates(self, tmp_path):
+        import delivery
+        import outbox
+        import storage
+
+        path = str(tmp_path / 'state.sqlite3')
+        first_store = storage.StateStore(path)
+        second_store = storage.StateStore(path)
+        first_store.save_poll('first', 1, notifications=[make_entry()])
+        second_store.save_poll('second', 1, notifications=[
+            make_entry(text='hw123 принята, вторая')])
+        first_queue = MockQueue([delivery.SENT])
+        second_queue = MockQueue([delivery.SENT])
+        first = outbox.OutboxRelay(
+            first_store, first_queue, accounts=['first'])
+        second = outbox.OutboxRelay(
+            second_store, second_queue, accounts=['second'])
+        assert first.relay() == 1
+        assert second.relay() == 1
+        assert first_queue.messages == [('42', 'hw123 принята')]
+        assert second_queue.messages == [('42', 'hw123 принята, вторая')], (
+            'Проверьте, что релей отправляет только уведомления '
+            'своих учётных записей'
+        )
+
+    def test_foreign_shard_backlog_does_not_block_relay(self, tmp_path):
+        import delivery
+        import outbox
+        import sharding
+        import storage
+
+        keys = [f'token-{number}:1' for number in range(200)]
+        own = keys[0]
+        foreign = [key for key in keys if sharding.shard_of(key, 64)
+                   != sharding.shard_of(own, 64)][:5]
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        for key in foreign + [own]:
+            store.save_poll(key, 1, notifications=[make_entry(text=key)])
+        queue = MockQueue([delivery.SENT])
+        relay = outbox.OutboxRelay(
+            store, queue, batch_size=5, accounts=keys,
+            coordinator=MockCoordinator({sharding.shard_of(own, 64)}))
+        assert relay.relay() == 1, (
+            'Проверьте, что чужие записи не занимают пачку релея'
+        )
+        assert queue.messages == [('42', own)]
+
+    def test_poll_writes_outbox(self, monkeypatch, tmp_path,
+                                random_timestamp):
+        import delivery
+        import homework
+        import outbox
+        import poller
+        import storage
+
+        def mock_request(token, current_timestamp, **kwargs):
+            return {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw123', 'status': 'approved'}
+                ],
+                'current_date': random_timestamp,
+            }
+
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses', mock_request)
+        store = storage.StateStore(str(tmp_path / 'state.sqlite3'))
+        queue = MockQueue([delivery.SENT])
+        relay = outbox.OutboxRelay(store, queue)
+        account = poller.Account('token', 42)
+        poller.poll_account(queue, account, store=store, relay=relay)
+        poller.poll_account(queue, account, store=store, relay=relay)
+        assert store.outbox_size() == 1
+        relay.relay()
+        relay.flush()
+        assert store.outbox_size() == 0
+        assert len(queue.messages) == 1
+
+
+class TestOutboundCallback:
+
+    def test_callback_receives_result(self):
+        import threading
+
+        import delivery
+
+        results = []
+        done = threading.Event()
+        queue = delivery.OutboundQueue(MockBot(), workers=1)
+        queue.start()
+        queue.put(42, 'text', callback=lambda result: (
+            results.append(result), done.set()))
+        assert done.wait(5)
+        queue.close(timeout=5)
+        assert results == [delivery.SENT]
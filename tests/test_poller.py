@@ -0,0 +1,148 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from utils import MockBot
+
+
+class TestPoller:
+
+    def test_load_accounts(self, tmp_path):
+        import poller
+
+        path = tmp_path / 'accounts.json'
+        path.write_text(json.dumps([
+            {'token': 'token-1', 'chat_id': 1},
+            {'token': 'token-2', 'chat_id': 2},
+        ]))
+        accounts = poller.load_accounts(path)
+        assert [(a.token, a.chat_id) for a in accounts] == [
+            ('token-1', 1), ('token-2', 2)
+        ], 'Проверьте, что `load_accounts` загружает все учётные записи'
+
+        path.write_text(json.dumps([{'token': 'token-1'}]))
+        with pytest.raises(KeyError):
+            poller.load_accounts(path)
+
+    def test_poll_account_sends_status_once(self, monkeypatch,
+                                            random_timestamp):
+        import homework
+        import poller
+
+        def mock_request(token, current_timestamp, **kwargs):
+            return {
+                'homeworks': [{'homework_name': token, 'status': 'approved'}],
+                'current_date': random_timestamp,
+            }
+
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses', mock_request)
+        bot = MockBot()
+        account = poller.Account('hw123', 42)
+        poller.poll_account(bot, account)
+        poller.poll_account(bot, account)
+        assert len(bot.messages) == 1, (
+            'Проверьте, что неизменившийся статус не отправляется повторно'
+        )
+        assert bot.messages[0][0] == 42
+        assert account.current_timestamp == random_timestamp
+
+    def test_poll_account_reports_error(self, monkeypatch):
+        import homework
+        import poller
+
+        def mock_request(token, current_timestamp, **kwargs):
+            raise ConnectionError('Endpoint error')
+
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses', mock_request)
+        bot = MockBot()
+        account = poller.Account('token', 42)
+        poller.poll_account(bot, account)
+        poller.poll_account(bot, account)
+        assert len(bot.messages) == 1, (
+            'Проверьте, что одинаковая ошибка отправляется только один раз'
+        )
+
+    def test_concurrency_limit(self, monkeypatch):
+        import poller
+
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def mock_poll_token(bot, accounts, session=None, store=None,
+                            cache=None, breaker=None, relay=None):
+            with lock:
+                active.append(accounts)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(accounts)
+
+        monkeypatch.setattr(poller, 'poll_token', mock_poll_token)
+        accounts = [poller.Account(f'token-{i}', i) for i in range(20)]
+        instance = poller.Poller(MockBot(), accounts, concurrency=3)
+
+        async def run_once():
+            instance._semaphore = asyncio.Semaphore(instance.concurrency)
+            await asyncio.gather(*(instance.poll(group)
+                                   for group in instance.groups))
+
+        asyncio.run(run_once())
+        assert len(peak) == len(accounts)
+        assert max(peak) <= 3, (
+            'Проверьте, что число одновременных запросов ограничено'
+        )
+
+    def test_wheel_spreads_and_repeats_polls(self, monkeypatch):
+        import poller
+
+        polls = []
+
+        def mock_poll_token(bot, accounts, session=None, store=None,
+                            cache=None, breaker=None, relay=None):
+            polls.append((accounts[0].chat_id, time.monotonic()))
+            return 0.1
+
+        monkeypatch.setattr(poller, 'poll_token', mock_poll_token)
+        accounts = [poller.Account(f'token-{i}', i) for i in range(4)]
+        instance = poller.Poller(
+            MockBot(), accounts, concurrency=4, spread=0.2, tick=0.01)
+
+        async def run_for(seconds):
+            try:
+                await asyncio.wait_for(instance.run(), seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        asyncio.run(run_for(0.5))
+        first = {}
+        for chat_id, polled_at in polls:
+            first.setdefault(chat_id, polled_at)
+        assert sorted(first) == [0, 1, 2, 3]
+        starts = sorted(first.values())
+        assert starts[-1] - starts[0] >= 0.1, (
+            'Проверьте, что первые опросы распределены по `spread`'
+        )
+        assert len(polls) >= 8, (
+            'Проверьте, что после опроса учётная запись снова ставится '
+            'в колесо'
+        )
+
+    def test_wheel_sets_expected_poll_time(self):
+        import poller
+
+        accounts = [poller.Account(f'token-{i}', i) for i in range(4)]
+        instance = poller.Poller(MockBot(), accounts, spread=600)
+        instance.start_wheel()
+        now = time.monotonic()
+        delays = [account.schedule.next_run - now for account in accounts]
+        assert all(abs(delay - expected) < 1 for delay, expected in zip(
+            delays, [0, 150, 300, 450])), (
+            'Проверьте, что ожидаемое время опроса совпадает с таймером '
+            'колеса и задержка опроса не завышается'
+        )
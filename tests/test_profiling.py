@@ -0,0 +1,72 @@
+import contextlib
+
+from utils import MockClock
+
+
+def busy(size=1000):
+    return [str(number) for number in range(size)]
+
+
+class TestProfiler:
+
+    def test_disabled_profiler_is_noop(self, tmp_path):
+        import profiling
+
+        profiler = profiling.Profiler(
+            enabled=False, slow=0, filename=str(tmp_path / 'profile.log'))
+        assert isinstance(profiler.iteration(), contextlib.nullcontext), (
+            'Проверьте, что выключенный профайлер не добавляет работы '
+            'итерации'
+        )
+        assert not (tmp_path / 'profile.log').exists()
+
+    def test_sampled_iterations(self, tmp_path):
+        import profiling
+
+        path = tmp_path / 'profile.log'
+        profiler = profiling.Profiler(
+            enabled=True, every=2, memory=True, slow=0, filename=str(path))
+        try:
+            for _ in range(4):
+                with profiler.iteration('poll'):
+                    busy()
+        finally:
+            profiler.disable()
+        content = path.read_text(encoding='utf-8')
+        assert content.count('Итерация poll за') == 2, (
+            'Проверьте, что профилируется каждая `every`-я итерация'
+        )
+        assert 'busy' in content
+        assert content.count('Прирост памяти') == 1, (
+            'Проверьте, что снимки tracemalloc сравниваются с прошлым'
+        )
+
+    def test_toggle(self, tmp_path):
+        import profiling
+
+        profiler = profiling.Profiler(
+            enabled=False, filename=str(tmp_path / 'profile.log'))
+        profiler.toggle()
+        assert profiler.enabled
+        profiler.toggle()
+        assert not profiler.enabled
+
+    def test_slow_iteration_dumps_stack(self, tmp_path):
+        import profiling
+
+        clock = MockClock()
+        path = tmp_path / 'profile.log'
+        profiler = profiling.Profiler(
+            enabled=False, slow=1000, filename=str(path), clock=clock)
+        with profiler.iteration('slow'):
+            assert profiler.check_slow() == 0
+            clock.now += 2000
+            assert profiler.check_slow() == 1
+            assert profiler.check_slow() == 0, (
+                'Проверьте, что стек медленной итерации пишется один раз'
+            )
+        content = path.read_text(encoding='utf-8')
+        assert 'Итерация slow идёт дольше' in content
+        assert 'test_slow_iteration_dumps_stack' in content, (
+            'Проверьте, что в файл попадает стек медленной итерации'
+        )
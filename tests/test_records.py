@@ -0,0 +1,44 @@
+import pytest
+
+
+class TestHomeworkRecord:
+
+    def test_from_dict(self):
+        import records
+
+        homework = records.Homework.from_dict({
+            'id': 123,
+            'homework_name': 'hw123',
+            'status': 'approved',
+            'reviewer_comment': 'Всё нравится',
+            'date_updated': '2020-02-13T14:40:57Z',
+        })
+        assert homework.status is records.HomeworkStatus.APPROVED, (
+            'Проверьте, что статус работы хранится как член HomeworkStatus'
+        )
+        assert homework.key == '123'
+        assert not hasattr(homework, '__dict__')
+
+    @pytest.mark.parametrize('data, error', [
+        ({'status': 'approved'}, KeyError),
+        ({'homework_name': 'hw123'}, KeyError),
+        ({'homework_name': 'hw123', 'status': 'unknown'}, ValueError),
+        ('hw123', TypeError),
+    ])
+    def test_from_dict_validates(self, data, error):
+        import records
+
+        with pytest.raises(error):
+            records.Homework.from_dict(data)
+
+    def test_check_homeworks_and_parse_status(self):
+        import homework
+
+        homeworks = homework.check_homeworks({
+            'homeworks': [{'homework_name': 'hw123', 'status': 'rejected'}],
+            'current_date': 1,
+        })
+        assert homework.parse_status(homeworks[0]) == (
+            'Изменился статус проверки работы "hw123". '
+            'Работа проверена: у ревьюера есть замечания.'
+        ), 'Проверьте, что `parse_status` принимает записи Homework'
@@ -0,0 +1,82 @@
+import json
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def locales_dir(tmp_path, monkeypatch):
+    import rendering
+
+    for name, template, verdicts in (
+        ('ru', 'Работа "$name". $verdict', {
+            'approved': 'Принята.', 'checked': 'Проверена.'}),
+        ('en', 'Homework "$name". $verdict', {'approved': 'Approved.'}),
+    ):
+        (tmp_path / f'{name}.json').write_text(json.dumps(
+            {'template': template, 'verdicts': verdicts}), encoding='utf-8')
+    monkeypatch.setattr(rendering, 'LOCALES_DIR', str(tmp_path))
+    rendering.clear_cache()
+    yield tmp_path
+    rendering.clear_cache()
+
+
+class TestRendering:
+
+    def test_default_locale_matches_parse_status(self):
+        import rendering
+
+        assert rendering.render('hw123', 'approved') == (
+            'Изменился статус проверки работы "hw123". '
+            'Работа проверена: ревьюеру всё понравилось. Ура!'
+        )
+
+    def test_render_is_memoized(self):
+        import rendering
+
+        rendering.render('hw-memo', 'reviewing', 'en')
+        hits = rendering.render.cache_info().hits
+        message = rendering.render('hw-memo', 'reviewing', 'en')
+        assert rendering.render.cache_info().hits == hits + 1
+        assert message == (
+            'Review status of "hw-memo" has changed. '
+            'The work has been taken for review.'
+        )
+
+    def test_locale_fallback(self, locales_dir):
+        import rendering
+
+        assert rendering.render('hw', 'approved', 'en') == (
+            'Homework "hw". Approved.')
+        assert rendering.render('hw', 'checked', 'en') == (
+            'Homework "hw". Проверена.'
+        ), 'Вердикт без перевода берётся из локали по умолчанию'
+        assert rendering.render('hw', 'approved', 'de') == (
+            'Работа "hw". Принята.')
+        assert rendering.render('hw', 'approved', '../ru') == (
+            'Работа "hw". Принята.')
+
+    def test_unknown_status(self, locales_dir):
+        import rendering
+
+        with pytest.raises(ValueError):
+            rendering.render('hw', 'unknown')
+
+    def test_status_added_in_locale_file(self, locales_dir):
+        import records
+        import rendering
+
+        homework = records.Homework.from_dict(
+            {'homework_name': 'hw', 'status': 'checked'}, rendering.statuses())
+        assert records.status_value(homework.status) == 'checked'
+        assert homework.status is sys.intern('checked'), (
+            'Проверьте, что статус из locales хранится интернированной '
+            'строкой'
+        )
+        with pytest.raises(ValueError):
+            records.Homework.from_dict(
+                {'homework_name': 'hw', 'status': 'checked'})
+        with pytest.raises(ValueError):
+            records.Homework.from_dict(
+                {'homework_name': 'hw', 'status': 'unknown'},
+                rendering.statuses())
@@ -0,0 +1,84 @@
+import json
+from http import HTTPStatus
+
+
+class MockResponse:
+
+    def __init__(self, data, status_code=HTTPStatus.OK, headers=None):
+        self.content = json.dumps(data).encode('utf-8')
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.decoded = 0
+
+    def json(self):
+        self.decoded += 1
+        return json.loads(self.content)
+
+
+class MockSession:
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+
+class TestResponseCache:
+
+    def test_fingerprint_ignores_current_date(self):
+        import response_cache
+
+        first = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        second = json.dumps({'homeworks': [], 'current_date': 2}).encode()
+        assert response_cache.fingerprint(first)[0] == \
+            response_cache.fingerprint(second)[0]
+        assert response_cache.fingerprint(second)[1] == 2
+
+    def test_unchanged_response_is_not_decoded(self):
+        import homework
+        import response_cache
+
+        homeworks = [{'homework_name': 'hw', 'status': 'approved'}]
+        responses = [
+            MockResponse({'homeworks': homeworks, 'current_date': 10}),
+            MockResponse({'homeworks': homeworks, 'current_date': 20}),
+        ]
+        session = MockSession(responses)
+        cache = response_cache.ResponseCache()
+        first = homework.request_homework_statuses(
+            'token', 1, session=session, cache=cache)
+        second = homework.request_homework_statuses(
+            'token', 10, session=session, cache=cache)
+        assert first['homeworks'] == homeworks
+        assert second == {'homeworks': [], 'current_date': 20}, (
+            'Проверьте, что совпавший ответ заменяется пустым списком работ '
+            'с новым `current_date`'
+        )
+        assert responses[1].decoded == 0, (
+            'Проверьте, что совпавший ответ не разбирается как JSON'
+        )
+        assert cache.skip_rate() == 0.5
+
+    def test_conditional_request(self):
+        import homework
+        import response_cache
+
+        responses = [
+            MockResponse(
+                {'homeworks': [], 'current_date': 10},
+                headers={'ETag': '"v1"'}),
+            MockResponse({}, status_code=HTTPStatus.NOT_MODIFIED),
+        ]
+        session = MockSession(responses)
+        cache = response_cache.ResponseCache()
+        homework.request_homework_statuses(
+            'token', 1, session=session, cache=cache)
+        result = homework.request_homework_statuses(
+            'token', 10, session=session, cache=cache)
+        assert session.headers[1]['If-None-Match'] == '"v1"', (
+            'Проверьте, что при наличии ETag запрос становится условным'
+        )
+        assert result == {'homeworks': [], 'current_date': 10}
@@ -0,0 +1,50 @@
+import random
+
+
+class TestPollSchedule:
+
+    def test_interval_depends_on_statuses(self):
+        import scheduler
+        import tracker
+
+        schedule = scheduler.PollSchedule(
+            retry_time=600, active_time=120, idle_time=1800)
+        reviewing = tracker.HomeworkStates({'1': 'reviewing', '2': 'approved'})
+        rejected = tracker.HomeworkStates({'1': 'rejected', '2': 'approved'})
+        idle = tracker.HomeworkStates({'1': 'approved'})
+        assert schedule.interval(reviewing) == 120, (
+            'Проверьте, что работы на проверке опрашиваются чаще'
+        )
+        assert schedule.interval(rejected) == 600
+        assert schedule.interval(idle) == 1800, (
+            'Проверьте, что без незавершённых работ опрос идёт реже'
+        )
+        assert schedule.interval(tracker.HomeworkStates()) == 1800
+
+    def test_success_applies_jitter(self):
+        import scheduler
+        import tracker
+
+        random.seed(0)
+        schedule = scheduler.PollSchedule(retry_time=600, jitter=0.1)
+        states = tracker.HomeworkStates({'1': 'rejected'})
+        delays = {schedule.success(states) for _ in range(20)}
+        assert len(delays) > 1
+        assert all(540 <= delay <= 660 for delay in delays)
+
+    def test_failure_backs_off_exponentially(self):
+        import scheduler
+        import tracker
+
+        random.seed(0)
+        schedule = scheduler.PollSchedule(error_time=60, max_error_time=300)
+        delays = [schedule.failure() for _ in range(5)]
+        bounds = [60, 120, 240, 300, 300]
+        for delay, bound in zip(delays, bounds):
+            assert bound / 2 <= delay <= bound, (
+                'Проверьте, что после ошибок интервал растёт экспоненциально '
+                'и не превышает максимума'
+            )
+        schedule.success(tracker.HomeworkStates())
+        assert schedule.failures == 0
+        assert schedule.failure() <= 60
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+
+class MockSession:
+
+    def __init__(self, random_timestamp):
+        self.random_timestamp = random_timestamp
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(kwargs)
+        session = self
+
+        class Response:
+            status_code = HTTPStatus.OK
+
+            def json(self):
+                return {
+                    'homeworks': [],
+                    'current_date': session.random_timestamp,
+                }
+
+        return Response()
+
+
+class TestSession:
+
+    def test_create_session(self):
+        import homework
+
+        session = homework.create_session(pool_size=7, retries=2)
+        adapter = session.get_adapter(homework.ENDPOINT)
+        assert adapter._pool_maxsize == 7, (
+            'Проверьте, что `create_session` задаёт размер пула соединений'
+        )
+        assert adapter.max_retries.total == 2, (
+            'Проверьте, что `create_session` настраивает повторы запросов'
+        )
+
+    def test_get_api_answer_uses_session(self, monkeypatch, random_timestamp,
+                                         current_timestamp):
+        import homework
+
+        session = MockSession(random_timestamp)
+        monkeypatch.setattr(homework, 'http_session', session)
+        result = homework.get_api_answer(current_timestamp)
+        assert result['current_date'] == random_timestamp
+        assert len(session.calls) == 1, (
+            'Проверьте, что `get_api_answer` использует заданную сессию'
+        )
+        assert session.calls[0]['timeout'] == (
+            homework.API_CONNECT_TIMEOUT, homework.API_READ_TIMEOUT
+        ), 'Проверьте, что запрос к API выполняется с таймаутами'
+
+    def test_explicit_timeout(self, random_timestamp, current_timestamp):
+        import homework
+
+        session = MockSession(random_timestamp)
+        homework.request_homework_statuses(
+            'token', current_timestamp, session=session, timeout=(1, 2))
+        assert session.calls[0]['timeout'] == (1, 2)
@@ -0,0 +1,150 @@
+from utils import MockClock
+
+
+class TestHashRing:
+
+    def test_adding_node_moves_only_its_share(self):
+        import sharding
+
+        items = range(2000)
+        before = sharding.HashRing(['w1', 'w2', 'w3', 'w4'])
+        after = sharding.HashRing(['w1', 'w2', 'w3', 'w4', 'w5'])
+        moved = [item for item in items
+                 if before.owner(item) != after.owner(item)]
+        assert all(after.owner(item) == 'w5' for item in moved), (
+            'Проверьте, что элементы переезжают только на новый узел'
+        )
+        assert len(moved) < len(items) * 0.35
+
+
+class TestShardCoordinator:
+
+    def make_coordinator(self, path, worker, clock):
+        import sharding
+
+        leases = sharding.LeaseTable(
+            str(path), worker=worker, ttl=30, clock=clock)
+        return sharding.ShardCoordinator(leases, shard_count=64, clock=clock)
+
+    def test_workers_split_shards_without_overlap(self, tmp_path):
+        clock = MockClock(1000.0)
+        path = tmp_path / 'leases.sqlite3'
+        first = self.make_coordinator(path, 'w1', clock)
+        assert len(first.refresh()) == 64
+
+        second = self.make_coordinator(path, 'w2', clock)
+        assert not second.refresh(), (
+            'Проверьте, что шард нельзя занять, пока его держит другой воркер'
+        )
+        first.refresh()
+        second.refresh()
+        assert first.owned and second.owned
+        assert not first.owned & second.owned, (
+            'Проверьте, что шард принадлежит только одному воркеру'
+        )
+        assert len(first.owned | second.owned) == 64
+
+        second.close()
+        clock.now += 31
+        assert len(first.refresh()) == 64, (
+            'Проверьте, что шарды ушедшего воркера переходят к оставшимся'
+        )
+
+    def test_busy_shard_is_kept_until_poll_ends(self, tmp_path):
+        import sharding
+
+        clock = MockClock(1000.0)
+        path = tmp_path / 'leases.sqlite3'
+        first = self.make_coordinator(path, 'w1', clock)
+        first.refresh()
+        second = self.make_coordinator(path, 'w2', clock)
+        second.refresh()
+        key = next(
+            f'account-{number}' for number in range(1000)
+            if sharding.HashRing(['w1', 'w2']).owner(
+                sharding.shard_of(f'account-{number}', 64)) == 'w2')
+        assert first.acquire(key)
+        first.refresh()
+        second.refresh()
+        assert not second.acquire(key), (
+            'Проверьте, что шард не переходит к другому воркеру во время опроса'
+        )
+        first.release(key)
+        first.refresh()
+        second.refresh()
+        assert second.acquire(key)
+        assert not first.acquire(key)
+
+    def test_poller_skips_foreign_accounts(self, monkeypatch, tmp_path):
+        import asyncio
+
+        import poller
+        import sharding
+
+        polled = []
+
+        def mock_poll_token(bot, accounts, *args):
+            polled.extend(account.key for account in accounts)
+            return 1
+
+        monkeypatch.setattr(poller, 'poll_token', mock_poll_token)
+        clock = MockClock(1000.0)
+        path = tmp_path / 'leases.sqlite3'
+        first = self.make_coordinator(path, 'w1', clock)
+        first.refresh()
+        second = self.make_coordinator(path, 'w2', clock)
+        second.refresh()
+        first.refresh()
+        second.refresh()
+        accounts = [poller.Account(f'token-{i}', i) for i in range(20)]
+        instance = poller.Poller(None, accounts, coordinator=second)
+
+        async def run_once():
+            instance._semaphore = asyncio.Semaphore(instance.concurrency)
+            return await asyncio.gather(
+                *(instance.poll_owned(group, True)
+                  for group in instance.groups))
+
+        results = asyncio.run(run_once())
+        expected = [account.key for account in accounts
+                    if sharding.shard_of(account.key, 64) in second.owned]
+        assert sorted(polled) == sorted(expected)
+        assert [owned for _, owned in results] == [
+            account.key in expected for account in accounts]
+
+    def test_token_subscriptions_share_shard(self):
+        import poller
+        import sharding
+
+        shards = {sharding.shard_of(poller.Account('token', chat).key, 64)
+                  for chat in range(20)}
+        assert len(shards) == 1, (
+            'Проверьте, что подписки на один токен попадают в один шард'
+        )
+
+    def test_wheel_holds_only_owned_tokens(self, tmp_path):
+        import poller
+        import sharding
+
+        clock = MockClock(1000.0)
+        path = tmp_path / 'leases.sqlite3'
+        first = self.make_coordinator(path, 'w1', clock)
+        first.refresh()
+        second = self.make_coordinator(path, 'w2', clock)
+        second.refresh()
+        first.refresh()
+        second.refresh()
+        accounts = [poller.Account(f'token-{i}', i) for i in range(20)]
+        instance = poller.Poller(None, accounts, coordinator=second)
+        instance.start_wheel()
+        assert len(instance.wheel) == 0
+        instance.sync_shards(second.owned)
+        owned = [account for account in accounts
+                 if sharding.shard_of(account.key, 64) in second.owned]
+        assert 0 < len(instance.wheel) == len(owned) < len(accounts), (
+            'Проверьте, что в колесо попадают только токены своих шардов'
+        )
+        instance.sync_shards(set())
+        assert len(instance.wheel) == 0, (
+            'Проверьте, что токены отданных шардов снимаются с колеса'
+        )
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT_DIR = dirname(dirname(abspath(__file__)))
+IMPORT_TIME_BUDGET = 0.5
+NETWORK_MODULES = ('requests', 'telegram', 'dotenv', 'urllib3')
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import homework
+elapsed = time.perf_counter() - started
+problems = homework.check_config()
+print(json.dumps({{
+    'elapsed': elapsed,
+    'loaded': [name for name in {NETWORK_MODULES!r} if name in sys.modules],
+    'problems': problems,
+}}))
+"""
+
+
+def run_python(args, **env):
+    environment = {
+        key: value for key, value in os.environ.items()
+        if key not in ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID')
+    }
+    environment.update(env)
+    return subprocess.run(
+        [sys.executable] + args, cwd=ROOT_DIR, env=environment,
+        capture_output=True, text=True, timeout=60)
+
+
+class TestStartup:
+
+    def test_import_skips_network_stack(self):
+        result = run_python(['-c', PROBE])
+        assert result.returncode == 0, result.stderr
+        probe = json.loads(result.stdout)
+        assert probe['loaded'] == [], (
+            'Проверьте, что импорт homework и check_config не загружают '
+            f'сетевые библиотеки: {probe["loaded"]}'
+        )
+        assert probe['elapsed'] < IMPORT_TIME_BUDGET, (
+            f'Импорт homework занял {probe["elapsed"]:.3f} с, '
+            f'бюджет {IMPORT_TIME_BUDGET} с'
+        )
+
+    def test_check_mode(self):
+        result = run_python(['homework.py', '--check'])
+        assert result.returncode == 1, (
+            'Проверьте, что --check завершается с ошибкой без токенов'
+        )
+        assert 'Отсутствуют обязательные переменные окружения' in (
+            result.stderr)
+
+        result = run_python(
+            ['homework.py', '--check'], PRACTICUM_TOKEN='token',
+            TELEGRAM_TOKEN='1234:abcdefg', TELEGRAM_CHAT_ID='12345')
+        assert result.returncode == 0, result.stderr
+
+    def test_env_file_is_searched_from_module_dir(self, monkeypatch,
+                                                  tmp_path):
+        import homework
+
+        monkeypatch.chdir(tmp_path)
+        assert homework.find_env_file('homework.py') == os.path.join(
+            ROOT_DIR, 'homework.py'), (
+            'Проверьте, что .env ищется от каталога homework.py, '
+            'а не от текущего каталога'
+        )
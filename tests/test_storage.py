@@ -0,0 +1,71 @@
+from utils import MockBot
+
+
+class TestStateStore:
+
+    def test_checkpoint_survives_restart(self, tmp_path, random_timestamp):
+        import storage
+
+        path = str(tmp_path / 'state.sqlite3')
+        account = storage.account_key('token', 42)
+        store = storage.StateStore(path)
+        assert store.load_checkpoint(account) is None
+        store.save_poll(account, random_timestamp, {'hw123': 'reviewing'})
+        store.save_poll(account, random_timestamp + 1, {'hw123': 'approved'})
+        store.close()
+
+        store = storage.StateStore(path)
+        assert store.load_checkpoint(account) == random_timestamp + 1, (
+            'Проверьте, что после перезапуска загружается последний '
+            '`current_date`'
+        )
+        assert store.load_statuses(account) == {'hw123': 'approved'}, (
+            'Проверьте, что после перезапуска загружаются последние статусы'
+        )
+
+    def test_account_key_hides_token(self):
+        import storage
+
+        key = storage.account_key('secret-token', 42)
+        assert 'secret-token' not in key
+        assert key != storage.account_key('secret-token', 43)
+
+    def test_poll_resumes_without_resending(self, monkeypatch, tmp_path,
+                                            random_timestamp):
+        import homework
+        import poller
+        import storage
+
+        requested = []
+
+        def mock_request(token, current_timestamp, **kwargs):
+            requested.append(current_timestamp)
+            return {
+                'homeworks': [
+                    {'id': 1, 'homework_name': 'hw123', 'status': 'approved'}
+                ],
+                'current_date': random_timestamp,
+            }
+
+        monkeypatch.setattr(
+            homework, 'request_homework_statuses', mock_request)
+        path = str(tmp_path / 'state.sqlite3')
+        bot = MockBot()
+
+        store = storage.StateStore(path)
+        account = poller.Account('token', 42)
+        account.restore(store)
+        poller.poll_account(bot, account, store=store)
+        store.close()
+
+        store = storage.StateStore(path)
+        account = poller.Account('token', 42)
+        account.restore(store)
+        poller.poll_account(bot, account, store=store)
+        assert requested[-1] == random_timestamp, (
+            'Проверьте, что после перезапуска опрос продолжается '
+            'с сохранённого `current_date`'
+        )
+        assert len(bot.messages) == 1, (
+            'Проверьте, что после перезапуска статус не отправляется повторно'
+        )
@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+
+HOMEWORKS = [
+    {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+    {'id': 1, 'homework_name': 'hw1', 'status': 'rejected',
+     'reviewer_comment': {'text': 'Замечания'}},
+]
+
+
+def make_stream(data, use_ijson, monkeypatch):
+    import streaming
+
+    if use_ijson:
+        pytest.importorskip('ijson')
+    else:
+        monkeypatch.setattr(streaming, 'ijson', None)
+    raw = io.BytesIO(json.dumps(data).encode('utf-8'))
+    return streaming.HomeworkStream(raw)
+
+
+@pytest.mark.parametrize('use_ijson', [True, False])
+class TestHomeworkStream:
+
+    def test_yields_homeworks(self, monkeypatch, use_ijson):
+        stream = make_stream(
+            {'homeworks': HOMEWORKS, 'current_date': 100},
+            use_ijson, monkeypatch)
+        assert list(stream) == HOMEWORKS, (
+            'Проверьте, что поток возвращает все работы из ответа API'
+        )
+        assert stream.current_date == 100
+
+    @pytest.mark.parametrize('data, error', [
+        ([{'homeworks': []}], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {'status': 'approved'}, 'current_date': 1}, TypeError),
+    ])
+    def test_validates_response(self, monkeypatch, use_ijson, data, error):
+        stream = make_stream(data, use_ijson, monkeypatch)
+        with pytest.raises(error):
+            list(stream)
+
+    def test_diff_stream(self, monkeypatch, use_ijson):
+        import records
+        import tracker
+
+        stream = make_stream(
+            {'homeworks': HOMEWORKS + [
+                {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'}],
+             'current_date': 100},
+            use_ijson, monkeypatch)
+        states = tracker.HomeworkStates({'1': 'rejected'})
+        transitions = states.diff_stream(
+            map(records.Homework.from_dict, stream))
+        assert [(t.key, t.new_status) for t in transitions] == [
+            ('2', 'approved')
+        ], (
+            'Проверьте, что для каждой работы учитывается только '
+            'самая новая запись'
+        )
+
+
+def test_stream_homework_statuses():
+    import homework
+
+    class Raw(io.BytesIO):
+        decode_content = False
+
+    class Response:
+        status_code = 200
+        raw = Raw(json.dumps(
+            {'homeworks': HOMEWORKS, 'current_date': 100}).encode('utf-8'))
+
+    class Session:
+        def get(self, url, **kwargs):
+            assert kwargs['stream'] is True, (
+                'Проверьте, что потоковый запрос выполняется со stream=True'
+            )
+            return Response()
+
+    stream = homework.stream_homework_statuses('token', 1, session=Session())
+    assert [hw['homework_name'] for hw in stream] == ['hw2', 'hw1']
+    assert stream.current_date == 100
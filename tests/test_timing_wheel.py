@@ -0,0 +1,58 @@
+import random
+
+from utils import MockClock
+
+
+def make_wheel(slots=(4, 4, 4)):
+    import timing_wheel
+
+    clock = MockClock()
+    return timing_wheel.TimingWheel(tick=1, slots=slots, clock=clock), clock
+
+
+def run_until(wheel, clock, end):
+    fired = {}
+    for now in range(1, end + 1):
+        clock.now = now
+        for item in wheel.advance():
+            fired[item] = now
+    return fired
+
+
+class TestTimingWheel:
+
+    def test_timers_fire_on_time_across_levels(self):
+        wheel, clock = make_wheel()
+        rng = random.Random(1)
+        delays = {item: rng.randint(1, 60) for item in range(500)}
+        for item, delay in delays.items():
+            wheel.schedule(delay, item)
+        assert len(wheel) == 500
+        fired = run_until(wheel, clock, 70)
+        assert fired == delays, (
+            'Проверьте, что таймеры всех уровней срабатывают в свой такт'
+        )
+        assert len(wheel) == 0
+
+    def test_timers_beyond_horizon(self):
+        wheel, clock = make_wheel()
+        wheel.schedule(150, 'far')
+        wheel.schedule(5, 'near')
+        assert run_until(wheel, clock, 200) == {'near': 5, 'far': 150}, (
+            'Проверьте, что таймер дальше горизонта колеса не срабатывает '
+            'раньше срока'
+        )
+
+    def test_cancel(self):
+        wheel, clock = make_wheel()
+        timer = wheel.schedule(20, 'cancelled')
+        wheel.schedule(20, 'kept')
+        wheel.cancel(timer)
+        wheel.cancel(timer)
+        assert not timer.active and len(wheel) == 1
+        assert run_until(wheel, clock, 30) == {'kept': 20}
+
+    def test_phases(self):
+        import timing_wheel
+
+        assert timing_wheel.phases(4, 600) == [0, 150, 300, 450]
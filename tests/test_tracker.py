@@ -0,0 +1,52 @@
+def make_homeworks(*items):
+    import records
+
+    return [records.Homework.from_dict(item) for item in items]
+
+
+class TestHomeworkStates:
+
+    def test_diff_emits_every_transition(self):
+        import tracker
+
+        states = tracker.HomeworkStates({'1': 'reviewing', '2': 'reviewing'})
+        homeworks = make_homeworks(
+            {'id': 3, 'homework_name': 'hw3', 'status': 'reviewing'},
+            {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+            {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+        )
+        transitions = states.diff(homeworks)
+        assert [(t.key, t.old_status, t.new_status) for t in transitions] == [
+            ('1', 'reviewing', 'approved'),
+            ('3', None, 'reviewing'),
+        ], (
+            'Проверьте, что `diff` возвращает по одному событию на каждый '
+            'изменившийся статус в хронологическом порядке'
+        )
+        assert states.get('1') == 'reviewing', (
+            'Проверьте, что `diff` не изменяет индекс до вызова `apply`'
+        )
+        assert states.apply(transitions) == {'1': 'approved', '3': 'reviewing'}
+        assert states.diff(homeworks) == [], (
+            'Проверьте, что повторный ответ API не порождает событий'
+        )
+
+    def test_key_falls_back_to_name(self):
+        named, numbered = make_homeworks(
+            {'homework_name': 'hw123', 'status': 'approved'},
+            {'id': 7, 'homework_name': 'hw', 'status': 'approved'},
+        )
+        assert named.key == 'hw123'
+        assert numbered.key == '7'
+
+    def test_repeated_entry_in_one_response(self):
+        import tracker
+
+        states = tracker.HomeworkStates()
+        transitions = states.diff(make_homeworks(
+            {'homework_name': 'hw', 'status': 'approved'},
+            {'homework_name': 'hw', 'status': 'reviewing'},
+        ))
+        assert [t.new_status for t in transitions] == [
+            'reviewing', 'approved'
+        ]
@@ -1,3 +1,5 @@
+import threading
+import time
 from inspect import signature
 from types import ModuleType
 
@@ -37,3 +39,32 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class MockBot:
+    """Бот, который запоминает отправленные сообщения.
+
+    errors - исключения, которые выбрасываются при первых отправках.
+    """
+
+    def __init__(self, errors=None):
+        self.messages = []
+        self.sent_at = []
+        self.errors = list(errors or [])
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        with self.lock:
+            if self.errors:
+                raise self.errors.pop(0)
+            self.messages.append((chat_id, text))
+            self.sent_at.append(time.monotonic())
+
+
+class MockClock:
+    """Часы, которые идут только по команде теста."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
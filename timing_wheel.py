@@ -0,0 +1,138 @@
+import math
+import os
+import time
+
+WHEEL_TICK = float(os.getenv('WHEEL_TICK', 1))
+WHEEL_SLOTS = (256, 64, 64, 64)
+
+
+def phases(count, period):
+    """Возвращает count стартовых задержек, равномерно делящих period."""
+    return [period * index / count for index in range(count)]
+
+
+class Timer:
+    """Запланированный элемент колеса; нужен для отмены."""
+
+    __slots__ = ('tick', 'item', 'bucket')
+
+    def __init__(self, tick, item):
+        """Создаёт таймер item на такт tick, ещё не поставленный в колесо."""
+        self.tick = tick
+        self.item = item
+        self.bucket = None
+
+    @property
+    def active(self):
+        """Ждёт ли таймер срабатывания."""
+        return self.bucket is not None
+
+
+class TimingWheel:
+    """Иерархическое колесо таймеров.
+
+    Время делится на такты по tick секунд. Уровень 0 хранит таймеры
+    ближайших slots[0] тактов по одному такту на ячейку, каждый
+    следующий уровень - в slots[level] раз более крупные ячейки.
+    Когда младший уровень проходит полный оборот, ячейка старшего
+    уровня раскладывается по младшим. Постановка и отмена таймера
+    стоят O(1), продвижение на такт - O(1) плюс число сработавших
+    и переложенных таймеров, независимо от общего числа таймеров.
+    Таймеры дальше горизонта колеса ставятся на его край
+    и переставляются, когда до него доходит очередь.
+    """
+
+    def __init__(self, tick=WHEEL_TICK, slots=WHEEL_SLOTS,
+                 clock=time.monotonic):
+        """Создаёт пустое колесо с уровнями по slots ячеек."""
+        self.tick = tick
+        self.clock = clock
+        self._start = clock()
+        self._now = 0
+        self._size = 0
+        self._spans = []
+        span = 1
+        for size in slots:
+            self._spans.append(span)
+            span *= size
+        self._horizon = span
+        self._levels = [[set() for _ in range(size)] for size in slots]
+
+    def __len__(self):
+        """Возвращает число ждущих таймеров."""
+        return self._size
+
+    def ticks(self, now=None):
+        """Возвращает номер такта для момента now."""
+        now = self.clock() if now is None else now
+        return math.floor((now - self._start) / self.tick)
+
+    def next_tick_at(self):
+        """Возвращает момент начала следующего такта."""
+        return self._start + (self._now + 1) * self.tick
+
+    def schedule(self, delay, item):
+        """Ставит item на срабатывание через delay секунд.
+
+        Возвращает Timer для cancel.
+        """
+        tick = math.ceil((self.clock() + delay - self._start) / self.tick)
+        timer = Timer(max(tick, self._now + 1), item)
+        self._place(timer)
+        self._size += 1
+        return timer
+
+    def cancel(self, timer):
+        """Отменяет таймер; для сработавшего или отменённого - без эффекта."""
+        if timer.bucket is not None:
+            timer.bucket.discard(timer)
+            timer.bucket = None
+            self._size -= 1
+
+    def advance(self, now=None):
+        """Продвигает колесо до момента now.
+
+        Возвращает элементы сработавших таймеров по порядку тактов.
+        """
+        target = self.ticks(now)
+        expired = []
+        while self._now < target:
+            self._now += 1
+            self._cascade()
+            bucket = self._levels[0][self._now % len(self._levels[0])]
+            timers = list(bucket)
+            bucket.clear()
+            for timer in timers:
+                timer.bucket = None
+                if timer.tick > self._now:
+                    self._place(timer)
+                    continue
+                self._size -= 1
+                expired.append(timer.item)
+        return expired
+
+    def _cascade(self):
+        for level in range(1, len(self._levels)):
+            if self._now % self._spans[level]:
+                return
+            slots = self._levels[level]
+            bucket = slots[self._now // self._spans[level] % len(slots)]
+            timers = list(bucket)
+            bucket.clear()
+            for timer in timers:
+                self._place(timer)
+
+    def _place(self, timer):
+        delta = timer.tick - self._now
+        tick = timer.tick
+        if delta >= self._horizon:
+            delta = self._horizon - 1
+            tick = self._now + delta
+        level = 0
+        while (level + 1 < len(self._levels)
+               and delta >= self._spans[level + 1]):
+            level += 1
+        slots = self._levels[level]
+        bucket = slots[tick // self._spans[level] % len(slots)]
+        bucket.add(timer)
+        timer.bucket = bucket
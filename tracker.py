@@ -0,0 +1,88 @@
+from collections import Counter, namedtuple
+
+import records
+
+Transition = namedtuple(
+    'Transition', ['key', 'homework', 'old_status', 'new_status'])
+
+
+class HomeworkStates:
+    """Индекс последних известных статусов работ по ключу работы.
+
+    Принимает записи records.Homework, статусы хранит строками.
+
+    Сравнение идёт только по статусу, поэтому изменение текста
+    уведомления не порождает ложных переходов. На каждую работу
+    из ответа API приходится одно обращение к словарю, сохранённая
+    история не перебирается.
+    """
+
+    def __init__(self, statuses=None):
+        """Принимает сохранённые статусы {работа: статус}."""
+        self.statuses = dict(statuses or {})
+        self._counts = Counter(self.statuses.values())
+
+    def __len__(self):
+        """Возвращает число известных работ."""
+        return len(self.statuses)
+
+    def get(self, key):
+        """Возвращает последний известный статус работы."""
+        return self.statuses.get(key)
+
+    def count(self, status):
+        """Возвращает число работ с указанным статусом."""
+        return self._counts[status]
+
+    def diff(self, homeworks):
+        """Возвращает переходы статусов, не изменяя индекс.
+
+        API отдаёт работы от новых к старым, переходы возвращаются
+        в хронологическом порядке.
+        """
+        pending = {}
+        transitions = []
+        for homework in reversed(homeworks):
+            key = homework.key
+            new_status = records.status_value(homework.status)
+            old_status = pending.get(key, self.statuses.get(key))
+            if new_status != old_status:
+                pending[key] = new_status
+                transitions.append(
+                    Transition(key, homework, old_status, new_status))
+        return transitions
+
+    def diff_stream(self, homeworks):
+        """Возвращает переходы для работ, приходящих по одной.
+
+        Работы идут от новых к старым, поэтому учитывается только
+        первое вхождение каждой работы. В памяти остаются лишь ключи
+        просмотренных работ и сами переходы.
+        """
+        seen = set()
+        transitions = []
+        for homework in homeworks:
+            key = homework.key
+            if key in seen:
+                continue
+            seen.add(key)
+            new_status = records.status_value(homework.status)
+            old_status = self.statuses.get(key)
+            if new_status != old_status:
+                transitions.append(
+                    Transition(key, homework, old_status, new_status))
+        transitions.reverse()
+        return transitions
+
+    def apply(self, transitions):
+        """Применяет переходы и возвращает изменения {работа: статус}."""
+        changes = {}
+        for transition in transitions:
+            changes[transition.key] = transition.new_status
+        for key, status in changes.items():
+            old_status = self.statuses.get(key)
+            if old_status is not None:
+                self._counts[old_status] -= 1
+            self._counts[status] += 1
+            self.statuses[key] = status
+        return changes